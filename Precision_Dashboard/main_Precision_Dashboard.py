@@ -5,6 +5,28 @@ import joblib
 from PIL import Image
 import plotly.express as px
 
+try:
+    # Shared sentry_lite helpers (run with Precision_UseCase on PYTHONPATH): cached
+    # loaders, the process-wide compact sponsor table that sessions hold handles to,
+    # duplicate clusters, running county/state risk aggregates for the heat map, and
+    # per-stage timers with the SENTRY_DEBUG_METRICS sidebar.
+    from sentry_lite.deduplication import cluster_members, duplicate_clusters, duplicate_report
+    from sentry_lite.registry import DatasetHandle, derive
+    from sentry_lite.resources import file_signature, load_excel, load_model, load_sponsor_table
+    from sentry_lite.risk_aggregates import RiskAggregates
+    from sentry_lite.score_cache import model_version
+    from sentry_lite.sponsor_table import ORANGE_COLUMNS, PURPLE_COLUMNS, display_frame, hash_hex
+    from sentry_lite.tracing import metrics_panel, stage
+    SENTRY_LITE = True
+except ImportError:
+    # Plain pandas/joblib fallbacks; the sentry_lite-only features are skipped.
+    from contextlib import nullcontext
+    SENTRY_LITE = False
+    load_excel, load_model = pd.read_excel, joblib.load
+    display_frame = hash_hex = lambda value: value
+    metrics_panel = lambda st: None
+    stage = lambda name: nullcontext()
+
 # -------------------------------
 # Page configuration and styling
 # -------------------------------
@@ -147,7 +169,7 @@ def load_logo():
 # -------------------------------
 
 def process_excel_file(file_path):
-    df = pd.read_excel(file_path)
+    df = load_excel(file_path)
     
     orange_columns = ["ID", "first_name", "last_name", "dob", "email", "phone", 
                       "sponsor_id_hash", "fingerprint_hash", "ssn"]
@@ -168,40 +190,56 @@ def process_excel_file(file_path):
 # Load a model if available
 MODEL_PATH = "models/sar_model.pkl"
 try:
-    model = joblib.load(MODEL_PATH)
+    model = load_model(MODEL_PATH)
     model_loaded = True
 except Exception:
     model_loaded = False
 
+# Fitted encoders and scaler saved by train_model alongside the model, if present
+PIPELINE_PATH = "models/sar_pipeline.pkl"
+try:
+    pipeline = load_model(PIPELINE_PATH)
+except Exception:
+    pipeline = None
+
 def predict_sponser_risk(record, model_loaded=None):
+    """Score one sponsor record: a one-row call to predict_sponser_risk_batch, so both share the same weights."""
+    return float(predict_sponser_risk_batch(pd.DataFrame([record])).iloc[0])
+
+def predict_sponser_risk_batch(purple_data):
+    """Vectorized predict_sponser_risk: scores every row of purple_data in one model call."""
     try:
-        from sentry_lite.risk_model import predict_risk
-        base_score = predict_risk(record, model)
+        from sentry_lite.risk_model import predict_risk_batch
+        base_score = pd.Series(predict_risk_batch(purple_data, model, pipeline), index=purple_data.index, dtype=float)
     except Exception:
-        base_score = 30 
-
-    if record.get("is_duplicate", False):
-        base_score += 5
-    if record.get("high_trafficking", False):
-        base_score += 20
-    if not record.get("Sponsor Registration", True):
-        base_score += 10
-    if not record.get("FBI Fingerprint (Galton)", True):
-        base_score += 10
-    if not record.get("Purple-Vetting", True):
-        base_score += 10        
-    if record.get("ICE", False):
-        base_score += 15        
-    if record.get("CBP", False):
-        base_score += 10
-    if not record.get("UAC Portal", True):
-        base_score += 8
-    if not record.get("Orange-IAM", True):
-        base_score += 5
-    if not record.get("ATIMS", True):
-        base_score += 5
-    
-    return min(base_score, 100)
+        base_score = pd.Series(30.0, index=purple_data.index)
+
+    def flag(col, default):
+        if col not in purple_data.columns:
+            return pd.Series(default, index=purple_data.index)
+        return purple_data[col].astype(bool)
+
+    base_score += 5 * flag("is_duplicate", False)
+    base_score += 20 * flag("high_trafficking", False)
+    base_score += 10 * ~flag("Sponsor Registration", True)
+    base_score += 10 * ~flag("FBI Fingerprint (Galton)", True)
+    base_score += 10 * ~flag("Purple-Vetting", True)
+    base_score += 15 * flag("ICE", False)
+    base_score += 10 * flag("CBP", False)
+    base_score += 8 * ~flag("UAC Portal", True)
+    base_score += 5 * ~flag("Orange-IAM", True)
+    base_score += 5 * ~flag("ATIMS", True)
+
+    return base_score.clip(upper=100)
+
+def score_sponsors(table):
+    """Risk scores for every row of the shared sponsor table, plus their per-county RiskAggregates."""
+    purple_data = table[[col for col in PURPLE_COLUMNS if col in table.columns]]
+    risk_scores = predict_sponser_risk_batch(purple_data).to_numpy()
+    risk_aggregates = RiskAggregates()
+    if "county" in purple_data.columns:
+        risk_aggregates.add(purple_data["county"], risk_scores)
+    return risk_scores, risk_aggregates
 
 # -------------------------------
 # Session State Initialization
@@ -218,8 +256,28 @@ if "data_sources" not in st.session_state:
         'uacs_data': False
     }
 
-if "orange_data" not in st.session_state or "purple_data" not in st.session_state:
-    st.session_state.orange_data, st.session_state.purple_data = process_excel_file("full_canonicalization_dataset_script_output.xlsx")
+SPONSOR_DATA_PATH = "full_canonicalization_dataset_script_output.xlsx"
+
+if SENTRY_LITE:
+    # One copy of the table per process, reloaded only when the file changes.
+    load_sponsor_table(SPONSOR_DATA_PATH, name="sponsors")
+    if "orange_data" not in st.session_state or "purple_data" not in st.session_state:
+        st.session_state.orange_data = DatasetHandle("sponsors", ORANGE_COLUMNS)
+        st.session_state.purple_data = DatasetHandle("sponsors", PURPLE_COLUMNS)
+    # Duplicate clusters are computed once per loaded table and shared by every session.
+    st.session_state.duplicate_labels = derive("sponsors", "duplicate_labels", duplicate_clusters)
+    st.session_state.duplicate_members = derive(
+        "sponsors", "duplicate_members", lambda table: cluster_members(derive("sponsors", "duplicate_labels", duplicate_clusters))
+    )
+else:
+    if "orange_data" not in st.session_state or "purple_data" not in st.session_state:
+        st.session_state.orange_data, st.session_state.purple_data = process_excel_file(SPONSOR_DATA_PATH)
+
+
+def session_frame(key):
+    """The DataFrame behind a session_state entry, whether it holds a DatasetHandle or a frame."""
+    value = st.session_state[key]
+    return value.frame() if hasattr(value, "frame") else value
 
 # -------------------------------
 # Navigation: Sidebar & Buttons
@@ -306,8 +364,8 @@ def orange_data_page():
     st.markdown('<div class="page-header">SPONSOR INFORMATION</div>', unsafe_allow_html=True)
     st.write("Review the sponsor data extracted from selected sources:")
     
-    orange_data = st.session_state.orange_data
-    st.dataframe(orange_data, use_container_width=True)
+    orange_data = session_frame("orange_data")
+    st.dataframe(display_frame(orange_data), use_container_width=True)
     
     st.subheader("Detailed Sponsor Information")
     selected_id = st.selectbox("Select a sponsor to view details:", orange_data['ID'].tolist())
@@ -325,8 +383,8 @@ def orange_data_page():
         st.markdown(f"""
         **Phone:** {selected_row['phone']}  
         **SSN:** {selected_row['ssn']}  
-        **ID Hash:** {selected_row['sponsor_id_hash']}  
-        **Fingerprint Hash:** {selected_row['fingerprint_hash']}  
+        **ID Hash:** {hash_hex(selected_row['sponsor_id_hash'])}  
+        **Fingerprint Hash:** {hash_hex(selected_row['fingerprint_hash'])}  
         """)
     
     render_navigation_buttons(prev_page=1, next_page=3)
@@ -335,8 +393,8 @@ def purple_data_page():
     st.markdown('<div class="page-header">SYSTEM CHECKS</div>', unsafe_allow_html=True)
     st.write("Review the system verification data and risk factors:")
     
-    purple_data = st.session_state.purple_data
-    orange_data = st.session_state.orange_data  # for duplicate lookup
+    purple_data = session_frame("purple_data")
+    orange_data = session_frame("orange_data")  # for duplicate lookup
     st.dataframe(purple_data, use_container_width=True)
     
     st.subheader("System Verification Status")
@@ -368,15 +426,20 @@ def purple_data_page():
     with cols2[0]:
         if selected_row["is_duplicate"]:
             st.markdown("<div class='risk-high'>DUPLICATE DETECTED</div>", unsafe_allow_html=True)
-            dup_fields = ["first_name", "last_name", "dob", "email", "phone", "ssn", "sponsor_id_hash", "fingerprint_hash"]
-            duplicate_mask = pd.Series([False] * len(orange_data))
-            for field in dup_fields:
-                duplicate_mask = duplicate_mask | (orange_data[field] == orange_data.iloc[sponsor_idx][field])
-            duplicate_mask &= (orange_data['ID'] != orange_data.iloc[sponsor_idx]['ID'])
-            duplicates = orange_data[duplicate_mask]
+            if "duplicate_labels" in st.session_state:
+                cluster_id = st.session_state.duplicate_labels[sponsor_idx]
+                duplicates = orange_data.iloc[st.session_state.duplicate_members[cluster_id]]
+                duplicates = duplicates[duplicates['ID'] != orange_data.iloc[sponsor_idx]['ID']]
+            else:
+                dup_fields = ["first_name", "last_name", "dob", "email", "phone", "ssn", "sponsor_id_hash", "fingerprint_hash"]
+                duplicate_mask = pd.Series([False] * len(orange_data))
+                for field in dup_fields:
+                    duplicate_mask = duplicate_mask | (orange_data[field] == orange_data.iloc[sponsor_idx][field])
+                duplicate_mask &= (orange_data['ID'] != orange_data.iloc[sponsor_idx]['ID'])
+                duplicates = orange_data[duplicate_mask]
             if not duplicates.empty:
                 st.markdown("**Duplicate Details:**")
-                st.dataframe(duplicates, use_container_width=True)
+                st.dataframe(display_frame(duplicates), use_container_width=True)
             else:
                 st.markdown("No duplicate details found.")
         else:
@@ -387,28 +450,33 @@ def purple_data_page():
             st.markdown("<div class='risk-high'>HIGH TRAFFICKING</div>", unsafe_allow_html=True)
         else:
             st.markdown("<div class='risk-low'>LOW TRAFFICKING</div>", unsafe_allow_html=True)
+
+    if "duplicate_labels" in st.session_state:
+        with st.expander("Duplicate Clusters Report"):
+            st.dataframe(display_frame(duplicate_report(orange_data, st.session_state.duplicate_labels)), use_container_width=True)
     
     render_navigation_buttons(prev_page=2, next_page=4)
 
-def heatmap_generator(results_df):
-    # Extract state and clean county name
-    results_df['State'] = results_df['County'].apply(lambda x: x.split(',')[1].strip() if ',' in x else 'Unknown')
-
-    # State name to abbreviation mapping
-    state_mapping = {
-        'Nevada': 'NV',
-        'New Mexico': 'NM',
-        'Texas': 'TX',
-        'California': 'CA',
-        'Florida': 'FL',
-        'Georgia': 'GA',
-        'Arizona': 'AZ'
-    }
-    # Apply the mapping to get state abbreviations
-    results_df['State_Abbr'] = results_df['State'].map(state_mapping)
-
-    # Calculate average risk score by state
-    state_risk = results_df.groupby(['State', 'State_Abbr'])['Risk Score'].mean().reset_index()
+def heatmap_generator(results_df, state_risk=None):
+    # state_risk: State, State_Abbr and mean 'Risk Score' per state, e.g. from RiskAggregates.state_table()
+    if state_risk is None:
+        # Without precomputed aggregates, extract the state from "County, State" here
+        state = results_df['County'].astype(str).str.split(',').str[1].str.strip().fillna('Unknown')
+
+        # State name to abbreviation mapping
+        state_mapping = {
+            'Nevada': 'NV',
+            'New Mexico': 'NM',
+            'Texas': 'TX',
+            'California': 'CA',
+            'Florida': 'FL',
+            'Georgia': 'GA',
+            'Arizona': 'AZ'
+        }
+
+        # Calculate average risk score by state
+        state_risk = (results_df.assign(State=state, State_Abbr=state.map(state_mapping))
+                      .groupby(['State', 'State_Abbr'])['Risk Score'].mean().reset_index())
 
     # Create choropleth map with full state names in hover text
     fig = px.choropleth(
@@ -439,32 +507,43 @@ def results_page():
     st.markdown('<div class="page-header">ANALYSIS RESULTS</div>', unsafe_allow_html=True)
     st.write("Risk assessment for sponsors:")
     
-    orange_data = st.session_state.orange_data
-    purple_data = st.session_state.purple_data
-    results = []
-    
-    for i in range(len(orange_data)):
-        sponsor = orange_data.iloc[i].to_dict()
-        system_checks = purple_data.iloc[i].to_dict()
-        risk_score = predict_sponser_risk(system_checks, model_loaded)
-        if risk_score >= 70:
-            risk_level = "HIGH RISK"
-        elif risk_score > 40:
-            risk_level = "MEDIUM RISK"
-        else:
-            risk_level = "LOW RISK"
-        results.append({
-            "ID": sponsor["ID"],
-            "First Name": sponsor["first_name"],
-            "Last Name": sponsor["last_name"],
-            "County": system_checks.get("county", ""),
-            "Is Duplicate": "Yes" if system_checks.get("is_duplicate", False) else "No",
-            "High Trafficking": "Yes" if system_checks.get("high_trafficking", False) else "No",
-            "Risk Score": risk_score,
-            "Risk Level": risk_level
-        })
-    
-    results_df = pd.DataFrame(results)
+    orange_data = session_frame("orange_data")
+    purple_data = session_frame("purple_data")
+
+    if SENTRY_LITE:
+        # Scored once per loaded table, model content and pipeline file version and shared by every session,
+        # with the county/state aggregates filled in as the scores are computed.
+        risk_scores, risk_aggregates = derive(
+            "sponsors",
+            (
+                "risk_scores",
+                model_version(model) if model_loaded else None,
+                file_signature(PIPELINE_PATH) if pipeline is not None else None,
+            ),
+            score_sponsors,
+        )
+        state_risk = risk_aggregates.state_table().rename(columns={"mean": "Risk Score"}).dropna(subset=["State_Abbr"])
+    else:
+        # Score all sponsors at once instead of calling the model row by row.
+        risk_scores = predict_sponser_risk_batch(purple_data).to_numpy()
+        state_risk = None
+    risk_levels = np.select([risk_scores >= 70, risk_scores > 40], ["HIGH RISK", "MEDIUM RISK"], "LOW RISK")
+
+    def yes_no(col):
+        if col not in purple_data.columns:
+            return "No"
+        return np.where(purple_data[col].astype(bool), "Yes", "No")
+
+    results_df = pd.DataFrame({
+        "ID": orange_data["ID"].to_numpy(),
+        "First Name": orange_data["first_name"].to_numpy(),
+        "Last Name": orange_data["last_name"].to_numpy(),
+        "County": purple_data["county"].to_numpy() if "county" in purple_data.columns else "",
+        "Is Duplicate": yes_no("is_duplicate"),
+        "High Trafficking": yes_no("high_trafficking"),
+        "Risk Score": risk_scores,
+        "Risk Level": risk_levels
+    })
     
     def highlight_risk(val):
         # Check if val is numeric (Risk Score)
@@ -505,7 +584,7 @@ def results_page():
         st.metric("Low Risk Cases", low_risk)
     
     st.subheader("Risk by County")
-    fig = heatmap_generator(results_df)
+    fig = heatmap_generator(results_df, state_risk)
     st.plotly_chart(fig)
     csv = results_df.to_csv(index=False)
     st.download_button(
@@ -528,14 +607,16 @@ def main():
     st.progress(progress_value)
     st.subheader(f"Step {st.session_state.page} of 4")
     
-    if st.session_state.page == 1:
-        data_fetching_page()
-    elif st.session_state.page == 2:
-        orange_data_page()
-    elif st.session_state.page == 3:
-        purple_data_page()
-    elif st.session_state.page == 4:
-        results_page()
+    with stage(f"render_page_{st.session_state.page}"):
+        if st.session_state.page == 1:
+            data_fetching_page()
+        elif st.session_state.page == 2:
+            orange_data_page()
+        elif st.session_state.page == 3:
+            purple_data_page()
+        elif st.session_state.page == 4:
+            results_page()
 
 if __name__ == "__main__":
     main()
+    metrics_panel(st)
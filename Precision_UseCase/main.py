@@ -3,8 +3,12 @@ import pandas as pd
 import numpy as np
 from PIL import Image
 import os
-import joblib
+import time
 from datetime import datetime, date
+from sentry_lite.registry import DatasetHandle
+from sentry_lite.resources import load_hash_list, load_identity_index, load_model, load_record_index, load_score_cache
+from sentry_lite.scoring import calculate_d_score
+from sentry_lite.tracing import metrics_panel, tracer
 
 # ----------------------------
 # Page and Styling Configuration
@@ -16,6 +20,7 @@ st.set_page_config(
     layout="wide",
     initial_sidebar_state="collapsed"
 )
+render_start = time.perf_counter()
 
 # Color palette from the company guidelines
 colors = {
@@ -330,40 +335,30 @@ def load_logo():
     except Exception:
         return None
 
-def calculate_d_score(score, sponsor_age, past_sponsorships, past_denials, 
-                      criminal_history, known_route, network_affiliation, prior_trafficking):
-    """Calculate the duplication risk score based on provided factors."""
-    d_score = score
-    if past_sponsorships != 0:
-        d_score += (past_sponsorships * 5)
-    if past_denials != 0:
-        d_score = 87
-    if 18 <= sponsor_age <= 28 or sponsor_age > 75:
-        d_score *= 1.2
-    if criminal_history: 
-        d_score *= 1.5
-    if known_route and network_affiliation and prior_trafficking:
-        return 98
-    if known_route:
-        d_score = 87
-    if network_affiliation:
-        d_score = 89
-    if prior_trafficking:
-        d_score = 92
-    return min(int(d_score), 100)
-
-# Load supporting files and model
+# Load supporting files and model (cached across reruns, reloaded only when the files change)
 MODEL_PATH = "models/sar_model.pkl"
-with open('fig_hast.txt', 'r') as f:
-    f_data = f.read().split(',')
+f_data = load_hash_list('fig_hast.txt')
 
 try:
-    model = joblib.load(MODEL_PATH)
+    model = load_model(MODEL_PATH)
     model_loaded = True
 except Exception:
     model_loaded = False
 
-data = pd.read_excel(r"synthetic data for ACF precision forum demo -april 14 2025 -acb.xlsx")
+# Fitted encoders and scaler saved by train_model alongside the model, if present
+PIPELINE_PATH = "models/sar_pipeline.pkl"
+try:
+    pipeline = load_model(PIPELINE_PATH)
+except Exception:
+    pipeline = None
+
+# Scores of sponsors already assessed in this process, keyed by their preprocessed features
+score_cache = load_score_cache()
+
+# Shared by every session; sessions keep DatasetHandles to matched rows instead of copies
+INTAKE_RECORDS = "intake_records"
+data_index = load_record_index(r"synthetic data for ACF precision forum demo -april 14 2025 -acb.xlsx", name=INTAKE_RECORDS)
+identity_index = load_identity_index(r"synthetic data for ACF precision forum demo -april 14 2025 -acb.xlsx")
 
 states = [
     "California",
@@ -450,9 +445,9 @@ if 'sponsor_ssn' not in st.session_state:
 if 'calculated_dob' not in st.session_state:
     st.session_state.calculated_dob = 'today'
 
-# Initialize fingure_data as an empty DataFrame so that .empty attribute can be used
+# Initialize fingure_data as a handle to no rows of the shared intake records
 if 'fingure_data' not in st.session_state:
-    st.session_state.fingure_data = pd.DataFrame()
+    st.session_state.fingure_data = DatasetHandle(INTAKE_RECORDS, rows=[])
 
 # ----------------------------
 # Header Section
@@ -531,8 +526,8 @@ with st.container():
         # Process the file (placeholder logic)
         sponsor_fingerprint = np.random.choice(f_data)
         st.write("Fingerprint hash:", sponsor_fingerprint)
-        fingure_data = data[data['fingerprint_hash'] == sponsor_fingerprint]
-        st.session_state.fingure_data = fingure_data
+        st.session_state.fingure_data = DatasetHandle(INTAKE_RECORDS, rows=data_index.positions("fingerprint_hash", sponsor_fingerprint))
+        fingure_data = st.session_state.fingure_data.frame()
         st.session_state.sponsor_name = fingure_data[['first_name', 'last_name']].agg(' '.join, axis=1).iloc[0]
         st.session_state.sponsor_staddress = np.random.choice(streets)
         st.session_state.sponsor_city = np.random.choice(cities)
@@ -629,8 +624,7 @@ if sponsor_name and sponsor_email and sponsor_phone and sponsor_zip and sponsor_
     }
     
     # Calculate risk using the imported risk model
-    from sentry_lite.risk_model import predict_risk
-    score = predict_risk(record, model)
+    score = score_cache.predict_risk(record, model, pipeline)
     score = min(max(score, 0), 100)
     
     # Adjust score with additional risk factors
@@ -701,10 +695,21 @@ if sponsor_name and sponsor_email and sponsor_phone and sponsor_zip and sponsor_
             "address": "789 Maple Boulevard, Mexico, TX 75001"
         }
     ]
-    if not st.session_state.fingure_data.empty:
-        sponsors_df = st.session_state.fingure_data[['first_name', 'last_name', 'phone', 'email']]
+    if len(st.session_state.fingure_data) > 0:
+        sponsors_df = st.session_state.fingure_data.frame()[['first_name', 'last_name', 'phone', 'email']]
     else:
-        sponsors_df = pd.DataFrame(sponsors)
+        # Without a fingerprint match, look for near-duplicate identities instead.
+        near_duplicates, _ = identity_index.query_positions({
+            "first_name": sponsor_name,
+            "dob": sponsor_dob,
+            "address": f"{sponsor_staddress} {sponsor_suite} {sponsor_city} {sponsor_states} {sponsor_zip}",
+            "phone": sponsor_phone,
+            "email": sponsor_email,
+        }, k=5)
+        if len(near_duplicates) > 0:
+            sponsors_df = DatasetHandle(INTAKE_RECORDS, rows=near_duplicates).frame()[['first_name', 'last_name', 'phone', 'email']]
+        else:
+            sponsors_df = pd.DataFrame(sponsors)
     sponsors_df.index = sponsors_df.index + 1
     st.table(sponsors_df)
     
@@ -725,3 +730,6 @@ if sponsor_name and sponsor_email and sponsor_phone and sponsor_zip and sponsor_
 # ----------------------------
 # Footer
 # ----------------------------
+
+tracer.record("render", time.perf_counter() - render_start)
+metrics_panel(st)
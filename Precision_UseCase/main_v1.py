@@ -3,8 +3,10 @@ import pandas as pd
 import numpy as np
 from PIL import Image
 import os
-import joblib
 from datetime import datetime, date
+from sentry_lite.resources import load_hash_list, load_model, load_record_index
+from sentry_lite.scoring import calculate_d_score
+from sentry_lite.tracing import metrics_panel
 
 
 # Set page configuration
@@ -347,38 +349,18 @@ col1, col2 = st.columns(2)
 MODEL_PATH = "models/sar_model.pkl"
 
     
-def read_fingerprint_data(filename='fig_hastu.txt'):
-    """Read fingerprint data with appropriate encoding handling"""
-    try:
-        # First try UTF-8
-        with open(filename, 'r', encoding='utf-8') as f:
-            f_data = f.read().split(',')
-            return f_data
-    except UnicodeDecodeError:
-        # If UTF-8 fails, try with cp1252 (Windows encoding)
-        try:
-            with open(filename, 'r', encoding='cp1252') as f:
-                f_data = f.read().split(',')
-                return f_data
-        except UnicodeDecodeError:
-            # If that still fails, use latin-1 which can read any byte
-            with open(filename, 'r', encoding='latin-1') as f:
-                f_data = f.read().split(',')
-                return f_data
-f_data = read_fingerprint_data(filename='fig_hastu.txt')
-# Use the function to read the data
-f_data = read_fingerprint_data()
+f_data = load_hash_list('fig_hastu.txt')
 
 # Try to load the model if it exists
 try:
-    model = joblib.load(MODEL_PATH)
+    model = load_model(MODEL_PATH)
     model_loaded = True
 except:
     model_loaded = False
     # We'll use mock data if model can't be loaded
 
 
-data = pd.read_excel(r"synthetic data for ACF precision forum demo -april 14 2025 -acb.xlsx")
+data_index = load_record_index(r"synthetic data for ACF precision forum demo -april 14 2025 -acb.xlsx")
 
 if 'sponsor_name' not in st.session_state:
     st.session_state.sponsor_name = ''
@@ -440,7 +422,7 @@ with col1:
             # sponsor_fingerprint = sponsor_fingerprint_file.getvalue().decode("utf-8")
             sponsor_fingerprint = np.random.choice(f_data)
             st.write("Fingerprint hash:", sponsor_fingerprint)
-            fingure_data = data[data['fingerprint_hash']==sponsor_fingerprint]
+            fingure_data = data_index.lookup_fingerprint(sponsor_fingerprint)
             st.session_state.fingure_data = fingure_data
             st.session_state.sponsor_name = fingure_data[['first_name', 'last_name']].agg(' '.join, axis=1).iloc[0]
             st.session_state.sponsor_address = fingure_data['address'].iloc[0]
@@ -549,40 +531,8 @@ if sponsor_name:
     score = min(max(score, 0), 100)
     
 
-    def calculate_d_score(score, sponsor_age, past_sponsorships, past_denials, criminal_history, known_route, network_affiliation, prior_trafficking):
-        d_score = score
-        
-        if past_sponsorships!=0:
-            d_score += (past_sponsorships*7)
-
-        if past_denials!=0:
-            d_score += (past_denials*10)
-
-        if 18 <= sponsor_age <= 28 or sponsor_age > 75:
-            d_score *= 1.2
-            
-        # Additional factor if female and criminal history
-        if criminal_history: 
-            d_score *= 1.5
-        if known_route and network_affiliation and prior_trafficking:
-            return 98
-        # Apply trafficking indicators - each one increases by factor of 1.2
-        if known_route:
-            d_score = 87
-        
-        if network_affiliation:
-            d_score = 89
-            # d_score *= 1.2
-        
-        if prior_trafficking:
-            d_score = 92
-            # d_score *= 1.2
-        
-        # Round to 2 decimal places
-        return min(int(d_score), 100)
-    
     # Fixed duplication score from your example
-    score = calculate_d_score(score, sponsor_age, past_sponsorships, past_denials, criminal_history, known_route, network_affiliation, prior_trafficking)
+    score = calculate_d_score(score, sponsor_age, past_sponsorships, past_denials, criminal_history, known_route, network_affiliation, prior_trafficking, version="v1")
     d_score = np.random.randint(30, 85)
     
     # Side by side scores without Key Factors
@@ -678,3 +628,5 @@ if sponsor_name:
 # Footer
 st.markdown("---")
 st.markdown('<div class="footer">SENTRY-Lite Sponsor Vetting System • For authorized use only • © 2025</div>', unsafe_allow_html=True)
+
+metrics_panel(st)
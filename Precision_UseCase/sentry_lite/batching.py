@@ -0,0 +1,127 @@
+# sentry_lite/batching.py
+
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from sentry_lite.risk_model import predict_risk_batch
+
+
+class MicroBatcher:
+    """
+    Collects single-record scoring requests from concurrent callers and scores
+    them together with one predict_risk_batch call.
+
+    A background thread takes the first waiting request, then keeps collecting
+    until max_batch_size requests are in hand or max_wait_ms has passed since
+    the first one arrived. Each caller gets its own result through a Future
+    (submit / predict) or an awaitable (predict_async). If a batch fails, its
+    records are scored one at a time so only the failing record's caller sees
+    the error.
+    """
+
+    def __init__(self, model, pipeline=None, max_batch_size=64, max_wait_ms=2.0):
+        self.model = model
+        self.pipeline = pipeline
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._batches = 0
+        self._requests_scored = 0
+        self._max_queue_depth = 0
+        self._closed = False
+
+        self._worker = threading.Thread(target=self._run, name="sentry-micro-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, record):
+        """Queue one record for scoring; returns a Future resolving to its SAR score."""
+        if self._closed:
+            raise RuntimeError("MicroBatcher is closed")
+        if not isinstance(record, dict):
+            raise TypeError(f"record must be a dict of features, not {type(record).__name__}")
+        future = Future()
+        self._queue.put((record, future))
+        depth = self._queue.qsize()
+        with self._lock:
+            self._requests += 1
+            self._max_queue_depth = max(self._max_queue_depth, depth)
+        return future
+
+    def predict(self, record, timeout=None):
+        """Blocking single-record prediction through the batcher."""
+        return self.submit(record).result(timeout)
+
+    async def predict_async(self, record):
+        """Awaitable single-record prediction through the batcher."""
+        return await asyncio.wrap_future(self.submit(record))
+
+    def stats(self):
+        """Queue-depth and batching counters."""
+        with self._lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "max_queue_depth": self._max_queue_depth,
+                "requests": self._requests,
+                "batches": self._batches,
+                "mean_batch_size": self._requests_scored / self._batches if self._batches else 0.0,
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000.0,
+            }
+
+    def _collect(self):
+        """Block for the first request, then gather more until the batch is full or the wait expires."""
+        batch = [self._queue.get()]
+        if batch[0] is None:
+            return None
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)  # let the outer loop see the shutdown marker
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            records = [record for record, _ in batch]
+            try:
+                scores = predict_risk_batch(records, self.model, self.pipeline)
+            except Exception as e:
+                if len(batch) == 1:
+                    batch[0][1].set_exception(e)
+                else:
+                    self._score_each(batch)
+            else:
+                for (_, future), score in zip(batch, scores):
+                    future.set_result(float(score))
+            with self._lock:
+                self._batches += 1
+                self._requests_scored += len(batch)
+
+    def _score_each(self, batch):
+        """Score a failed batch record by record, so one bad record only fails its own future."""
+        for record, future in batch:
+            try:
+                future.set_result(float(predict_risk_batch([record], self.model, self.pipeline)[0]))
+            except Exception as e:
+                future.set_exception(e)
+
+    def close(self):
+        """Stop accepting requests; queued requests are still scored before the worker exits."""
+        self._closed = True
+        self._queue.put(None)
+        self._worker.join()
@@ -0,0 +1,303 @@
+# sentry_lite/benchmark.py
+"""
+Reproducible benchmarks for the scoring, deduplication and loading paths.
+
+    python -m sentry_lite.benchmark --sizes 1000 100000
+    python -m sentry_lite.benchmark --sizes 10000000 --only predict_batch duplicate_clusters --check
+
+Each run generates a synthetic sponsor population per size (seeded, so runs are
+comparable), times the selected benchmarks and appends the results to a JSON
+history file. A result is flagged as a regression when it is slower than the
+median of the same measurement over the previous --baseline-runs runs by more
+than its threshold; with --check the command then exits with status 1.
+"""
+
+import argparse
+import binascii
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from faker import Faker
+
+from sentry_lite.datastore import convert_workbook, read_arrow
+from sentry_lite.deduplication import build_index, duplicate_clusters
+from sentry_lite.pipeline import PIPELINE_PATH
+from sentry_lite.resources import load_model
+from sentry_lite.risk_model import MODEL_FEATURES, predict_risk, predict_risk_batch, train_model
+
+HISTORY_PATH = "benchmarks/history.json"
+# The synthetic_population columns train_model expects.
+TRAINING_COLUMNS = ["UID"] + MODEL_FEATURES[:-1] + ["SAR", "HTR", "is_high_risk_sar", "is_high_risk_htr"]
+DEFAULT_THRESHOLD = 0.20
+# Single-call latencies are noisier than bulk timings.
+THRESHOLDS = {"predict_single": 0.35, "dedup_query": 0.35}
+
+_LEVELS = np.array(["Low", "Medium"], dtype=object)
+
+
+def _vocabulary(seed, size=1000):
+    """Small Faker-generated vocabularies that rows are sampled from."""
+    fake = Faker("en_US")
+    fake.seed_instance(seed)
+    return {
+        "first_name": np.array(sorted({fake.first_name() for _ in range(size)}), dtype=object),
+        "last_name": np.array(sorted({fake.last_name() for _ in range(size)}), dtype=object),
+        "county": np.array(sorted({f"{fake.city()} County, {fake.state()}" for _ in range(size // 10)}), dtype=object),
+        "domain": np.array(sorted({fake.free_email_domain() for _ in range(50)}), dtype=object),
+        "dob": pd.date_range("1940-01-01", "2004-12-31", freq="D").strftime("%Y-%m-%d").to_numpy(dtype=object),
+    }
+
+
+def _hex_hashes(rng, n):
+    """n random 64-character hex strings (stand-ins for SHA-256 digests)."""
+    hexed = binascii.hexlify(rng.bytes(32 * n))
+    return pd.Series(np.frombuffer(hexed, dtype="S64")).str.decode("ascii")
+
+
+def synthetic_population(n, seed=0, duplicate_fraction=0.2):
+    """
+    Generate n sponsor rows with the training columns train_model expects and
+    the identity/system-check columns process_excel_file expects. Faker builds
+    the name, county and domain vocabularies; rows are sampled from them with
+    NumPy so large sizes stay fast. duplicate_fraction of the rows reuse the
+    identity of an earlier row.
+    """
+    rng = np.random.default_rng(seed)
+    vocab = _vocabulary(seed)
+    df = pd.DataFrame({"UID": np.arange(1, n + 1), "ID": np.arange(1, n + 1)})
+
+    # Training features and targets
+    for col in ["Age", "Country_of_Origin", "Financial_Status", "Trafficking_Hotspot_Residence"]:
+        df[col] = _LEVELS[rng.integers(0, 2, n)]
+    for col in ["Gender", "Family_Ties_Status", "Prior_Trafficking_History", "Criminal_History",
+                "Known_Trafficking_Route", "Past_Human_Trafficking_Case", "Trafficking_Network_Affiliation",
+                "Illegal_Border_Crossing_Record", "Duplicate_Records", "Financial_Transactions_Flagged",
+                "Background_Check_Status", "Identity_Document_Verification", "Unusual_Sponsor_UAC_Relationship"]:
+        df[col] = rng.integers(0, 2, n)
+    for col in ["Past_Sponsorships", "Past_Denials", "Multiple_Unrelated_UACs"]:
+        df[col] = rng.integers(0, 3, n)
+    df["Multiple_ICE_Investigations"] = rng.integers(0, 11, n)
+    signal = (20 + 10 * df["Past_Denials"] + 15 * df["Criminal_History"] + 12 * df["Known_Trafficking_Route"]
+              + 8 * df["Trafficking_Network_Affiliation"] + 2 * df["Multiple_ICE_Investigations"])
+    df["SAR"] = np.clip(signal + rng.normal(0, 15, n), 1, 100).astype(np.int64)
+    df["HTR"] = np.clip(signal + rng.normal(0, 20, n), 1, 100).astype(np.int64)
+    df["is_high_risk_sar"] = (df["SAR"] > 70).astype(np.int64)
+    df["is_high_risk_htr"] = (df["HTR"] > 70).astype(np.int64)
+
+    # Identity fields; duplicates copy them from an earlier row.
+    source = np.arange(n)
+    duplicates = np.flatnonzero(rng.random(n) < duplicate_fraction)
+    duplicates = duplicates[duplicates > 0]
+    source[duplicates] = rng.integers(0, duplicates)
+    # A copy of a copy must point at the original; sources precede their copies,
+    # so pointer jumping reaches the roots in O(log chain length) passes.
+    while (source[source] != source).any():
+        source = source[source]
+    first = vocab["first_name"][rng.integers(0, len(vocab["first_name"]), n)][source]
+    last = vocab["last_name"][rng.integers(0, len(vocab["last_name"]), n)][source]
+    dob = vocab["dob"][rng.integers(0, len(vocab["dob"]), n)][source]
+    df["first_name"], df["last_name"], df["dob"] = first, last, dob
+    df["email"] = (pd.Series(first).str.lower() + "." + pd.Series(last).str.lower()
+                   + pd.Series(source % 1000).astype(str) + "@"
+                   + vocab["domain"][rng.integers(0, len(vocab["domain"]), n)][source]).to_numpy()
+    df["phone"] = pd.Series(rng.integers(2_000_000_000, 9_999_999_999, n)[source]).astype(str).to_numpy()
+    ssn = rng.integers(100_000_000, 899_999_999, n)[source]
+    df["ssn"] = (pd.Series(ssn // 1_000_000).astype(str) + "-" + pd.Series(ssn // 10_000 % 100).astype(str).str.zfill(2)
+                 + "-" + pd.Series(ssn % 10_000).astype(str).str.zfill(4)).to_numpy()
+    df["sponsor_id_hash"] = _hex_hashes(rng, n).to_numpy()[source]
+    fingerprints = _hex_hashes(rng, n).to_numpy()[source]
+    fingerprints[rng.random(n) < 0.25] = None
+    df["fingerprint_hash"] = fingerprints
+    df["Sponsor_ID"] = (pd.Series(first) + " " + pd.Series(last) + " " + pd.Series(dob)).to_numpy()
+
+    # System checks
+    df["is_duplicate"] = np.isin(np.arange(n), duplicates)
+    df["county"] = pd.Categorical.from_codes(rng.integers(0, len(vocab["county"]), n), vocab["county"])
+    df["high_trafficking"] = rng.random(n) < 0.15
+    for col, pass_rate in [("Sponsor Registration", 0.9), ("FBI Fingerprint (Galton)", 0.85), ("Orange-IAM", 0.9),
+                           ("Purple-Vetting", 0.85), ("UAC Portal", 0.95), ("ATIMS", 0.9), ("DHS Payment", 0.9),
+                           ("Local Welfare Services", 0.9)]:
+        df[col] = rng.random(n) < pass_rate
+    df["ICE"] = rng.random(n) < 0.1
+    df["CBP"] = rng.random(n) < 0.1
+    return df
+
+
+def _best_of(func, repeat):
+    """Minimum wall time of func() over repeat runs."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def single_records(population, n=200):
+    """
+    The first n rows of population as the record dicts single-record callers
+    (main.py, the scoring service) send: numeric codes, not "Low"/"Medium".
+    """
+    records = population[MODEL_FEATURES[:-1]].head(n)
+    records = records.assign(**{col: (records[col] == "Medium").astype(int) for col in ["Age", "Trafficking_Hotspot_Residence"]})
+    return records.to_dict("records")
+
+
+def bench_predict_single(ctx):
+    records = single_records(ctx["population"])
+    seconds = _best_of(lambda: [predict_risk(record, ctx["model"], ctx["pipeline"]) for record in records], ctx["repeat"])
+    return {"predict_single": seconds / len(records)}
+
+
+def bench_predict_batch(ctx):
+    return {"predict_batch": _best_of(lambda: predict_risk_batch(ctx["population"], ctx["model"], ctx["pipeline"]), ctx["repeat"])}
+
+
+def bench_deduplicate(ctx):
+    population = ctx["population"]
+    start = time.perf_counter()
+    index = build_index(population)
+    build = time.perf_counter() - start
+    queries = population["Sponsor_ID"].sample(min(100, len(population)), random_state=0).tolist()
+    query = _best_of(lambda: [index.query(value) for value in queries], ctx["repeat"]) / len(queries)
+    return {"dedup_index_build": build, "dedup_query": query}
+
+
+def bench_duplicate_clusters(ctx):
+    return {"duplicate_clusters": _best_of(lambda: duplicate_clusters(ctx["population"]), ctx["repeat"])}
+
+
+def bench_load(ctx):
+    """Excel vs. Arrow IPC load of the population's dashboard columns."""
+    population = ctx["population"]
+    if len(population) > ctx["excel_max_rows"]:
+        return {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        xlsx = os.path.join(tmp_dir, "population.xlsx")
+        population.drop(columns=["county"]).assign(county=population["county"].astype(str)).to_excel(xlsx, index=False)
+        arrow = convert_workbook(xlsx)
+        return {
+            "load_excel": _best_of(lambda: pd.read_excel(xlsx), 1),
+            "load_arrow": _best_of(lambda: read_arrow(arrow), ctx["repeat"]),
+        }
+
+
+def bench_train(ctx):
+    """train_model (halving search) on at most train_max_rows rows, writing its models to a scratch directory."""
+    population = ctx["population"].head(ctx["train_max_rows"])
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.makedirs(os.path.join(tmp_dir, "models"))
+        os.chdir(tmp_dir)
+        try:
+            seconds = _best_of(lambda: train_model(population[TRAINING_COLUMNS].copy(), search="halving", checkpoint_path=None), 1)
+        finally:
+            os.chdir(cwd)
+    return {"train": seconds}
+
+
+BENCHMARKS = {
+    "predict_single": bench_predict_single,
+    "predict_batch": bench_predict_batch,
+    "deduplicate": bench_deduplicate,
+    "duplicate_clusters": bench_duplicate_clusters,
+    "load": bench_load,
+    "train": bench_train,
+}
+
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f)
+
+
+def find_regressions(history, results, baseline_runs=5, threshold=None):
+    """
+    Compare results ({key: seconds}) with the median of the last baseline_runs
+    recorded values of each key. Returns [(key, seconds, baseline, allowed_ratio)]
+    for results slower than baseline * (1 + threshold).
+    """
+    regressions = []
+    for key, seconds in results.items():
+        previous = [run["results"][key] for run in history if key in run["results"]][-baseline_runs:]
+        if not previous:
+            continue
+        baseline = float(np.median(previous))
+        allowed = 1 + (threshold if threshold is not None else THRESHOLDS.get(key.split("@")[0], DEFAULT_THRESHOLD))
+        if seconds > baseline * allowed:
+            regressions.append((key, seconds, baseline, allowed))
+    return regressions
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes, only=None, repeat=3, seed=0, excel_max_rows=100_000, train_max_rows=50_000,
+        model_path="models/sar_model.pkl", pipeline_path=PIPELINE_PATH):
+    """Run the selected benchmarks at each size; returns {"<measurement>@<size>": seconds}."""
+    model = load_model(model_path)
+    pipeline = load_model(pipeline_path) if pipeline_path and os.path.exists(pipeline_path) else None
+    results = {}
+    for n in sizes:
+        population = synthetic_population(n, seed=seed)
+        ctx = {"population": population, "model": model, "pipeline": pipeline, "repeat": repeat,
+               "excel_max_rows": excel_max_rows, "train_max_rows": train_max_rows}
+        for name, bench in BENCHMARKS.items():
+            if only and name not in only:
+                continue
+            for measurement, seconds in bench(ctx).items():
+                results[f"{measurement}@{n}"] = seconds
+                print(f"{measurement}@{n}: {seconds:.6f}s")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark sentry_lite scoring, deduplication and loading.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000], help="Population sizes (1k to 10M)")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="Benchmarks to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per timing; the fastest is kept")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--excel-max-rows", type=int, default=100_000, help="Skip the Excel load benchmark above this size")
+    parser.add_argument("--train-max-rows", type=int, default=50_000, help="Rows used by the training benchmark")
+    parser.add_argument("--history", default=HISTORY_PATH, help=f"JSON history file (default: {HISTORY_PATH})")
+    parser.add_argument("--baseline-runs", type=int, default=5, help="Previous runs whose median is the baseline")
+    parser.add_argument("--threshold", type=float, help="Allowed slowdown for every measurement (default: per benchmark)")
+    parser.add_argument("--check", action="store_true", help="Exit with status 1 if any measurement regressed")
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, args.only, args.repeat, args.seed, args.excel_max_rows, args.train_max_rows)
+
+    history = load_history(args.history)
+    regressions = find_regressions(history, results, args.baseline_runs, args.threshold)
+    for key, seconds, baseline, allowed in regressions:
+        print(f"REGRESSION {key}: {seconds:.6f}s vs baseline {baseline:.6f}s (allowed x{allowed:.2f})")
+
+    history.append({
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "results": results,
+        "regressions": [key for key, *_ in regressions],
+    })
+    os.makedirs(os.path.dirname(args.history) or ".", exist_ok=True)
+    with open(args.history, "w") as f:
+        json.dump(history, f, indent=2)
+
+    if args.check and regressions:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
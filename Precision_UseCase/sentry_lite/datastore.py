@@ -0,0 +1,125 @@
+# sentry_lite/datastore.py
+
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+from sentry_lite.tracing import timed
+
+COLUMNAR_SUFFIX = ".arrow"
+
+
+def columnar_path(excel_path):
+    """Location of the Arrow IPC copy of a workbook: same directory and name, .arrow suffix."""
+    return os.path.splitext(excel_path)[0] + COLUMNAR_SUFFIX
+
+
+def normalize_dtypes(df):
+    """
+    Give every column an explicit Arrow-compatible dtype.
+    Object columns in these workbooks mix ints, strings and dates (phone, ssn, dob),
+    so they are stored as strings with nulls preserved; bool, int and float columns
+    keep their numeric dtypes.
+    """
+    df = df.copy()
+    df.columns = [str(col) for col in df.columns]
+    for col in df.columns:
+        if df[col].dtype == object:
+            df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+    return df
+
+
+def arrow_schema(df):
+    """
+    Explicit Arrow schema for a normalized frame. Object columns become string;
+    the rest, including category, string[pyarrow] and ArrowDtype columns, get
+    the type pyarrow infers from their pandas dtype.
+    """
+    fields = []
+    for col in df.columns:
+        if df[col].dtype == object:
+            fields.append(pa.field(col, pa.string()))
+        else:
+            fields.append(pa.Schema.from_pandas(df[[col]], preserve_index=False).field(col))
+    return pa.schema(fields)
+
+
+def workbook_table(excel_path):
+    """Parse an Excel workbook into the Arrow table convert_workbook stores for it."""
+    df = normalize_dtypes(pd.read_excel(excel_path))
+    return pa.Table.from_pandas(df, schema=arrow_schema(df), preserve_index=False)
+
+
+def convert_workbook(excel_path, output_path=None):
+    """
+    Convert an Excel workbook into an uncompressed Arrow IPC file once.
+    Uncompressed IPC can be memory-mapped, so later reads skip parsing entirely.
+    """
+    output_path = output_path or columnar_path(excel_path)
+    feather.write_feather(workbook_table(excel_path), output_path, compression="uncompressed")
+    return output_path
+
+
+def read_arrow(path):
+    """Read an Arrow IPC file through a memory map."""
+    with pa.memory_map(path, "r") as source:
+        return pa.ipc.open_file(source).read_all().to_pandas()
+
+
+def resolve_source(path):
+    """
+    Return the file read_table will actually read for path: the columnar copy of
+    an Excel workbook when it exists and is at least as new as the workbook.
+    """
+    if path.endswith((".xlsx", ".xls")):
+        arrow_path = columnar_path(path)
+        if os.path.exists(arrow_path) and (
+            not os.path.exists(path) or os.path.getmtime(arrow_path) >= os.path.getmtime(path)
+        ):
+            return arrow_path
+    return path
+
+
+@timed("load_table")
+def read_table(path):
+    """
+    Load a sponsor table, preferring columnar formats.
+    Excel paths transparently use their .arrow copy when it is up to date; a
+    workbook without one goes through the same Arrow conversion, so both give
+    identical dtypes.
+    """
+    source = resolve_source(path)
+    if source.endswith((COLUMNAR_SUFFIX, ".feather")):
+        return read_arrow(source)
+    if source.endswith(".parquet"):
+        return pd.read_parquet(source)
+    if source.endswith(".csv"):
+        return pd.read_csv(source)
+    return workbook_table(source).to_pandas()
+
+
+def iter_chunks(path, chunk_size=100_000, dtype=None):
+    """
+    Yield a sponsor table as DataFrames of at most chunk_size rows without
+    loading it whole. CSV is read with pandas' chunked reader, Parquet one
+    record batch at a time, and Arrow IPC through a memory map. Excel cannot be
+    streamed, so a workbook is only accepted once ingest has written its .arrow copy.
+    dtype is passed to read_csv so CSV chunks do not each infer their own types;
+    the other formats are already typed.
+    """
+    source = resolve_source(path)
+    if source.endswith(".csv"):
+        yield from pd.read_csv(source, chunksize=chunk_size, dtype=dtype)
+    elif source.endswith(".parquet"):
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    elif source.endswith((COLUMNAR_SUFFIX, ".feather")):
+        with pa.memory_map(source, "r") as mapped:
+            table = pa.ipc.open_file(mapped).read_all()
+            for offset in range(0, table.num_rows, chunk_size):
+                yield table.slice(offset, chunk_size).to_pandas()
+    else:
+        raise ValueError(f"Cannot stream {path}; run python -m sentry_lite.ingest on it or export it to CSV/Parquet first")
@@ -1,27 +1,237 @@
+# sentry_lite/deduplication.py
+import functools
+from collections import defaultdict
 
+import numpy as np
+import pandas as pd
+from rapidfuzz import fuzz, process, utils
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
 
-# sentry_lite/deduplication.py 
-from fuzzywuzzy import fuzz 
+from sentry_lite.tracing import timed
 
 
-def match_score(name1, name2): 
+def match_score(name1, name2):
 
-    return fuzz.token_sort_ratio(name1, name2) 
+    return int(round(fuzz.token_sort_ratio(name1, name2, processor=utils.default_process)))
 
- 
 
-def deduplicate(sponsor_df, new_record): 
+def _normalize(value):
+    """Apply the same normalization token_sort_ratio uses: clean, lowercase, sort tokens."""
+    return " ".join(sorted(utils.default_process(str(value)).split()))
 
-    results = [] 
 
-    for _, row in sponsor_df.iterrows(): 
+_SOUNDEX = str.maketrans("abcdefghijklmnopqrstuvwxyz", "01230120022455012623010202")
 
-        score = match_score(row["Sponsor_ID"], new_record["Sponsor_ID"]) 
 
-        if score > 85: 
+@functools.lru_cache(maxsize=65536)
+def soundex(token):
+    """American Soundex code of a lowercase alphabetic token ("robert" -> "r163")."""
+    digits = token.translate(_SOUNDEX)
+    code, last = token[0], digits[0]
+    for char, digit in zip(token[1:], digits[1:]):
+        if digit != last and digit != "0":
+            code += digit
+        # h and w do not separate two letters with the same code; vowels do.
+        if char not in "hw":
+            last = digit
+    return (code + "000")[:4]
 
-            results.append((row["Sponsor_ID"], score)) 
 
-    return results 
+def blocking_keys(key):
+    """
+    Blocking keys of a normalized Sponsor_ID: the Soundex code of each name token
+    paired with the DOB year and with the zip prefix, plus each pair of name
+    codes. Two IDs are only compared when they share at least one of these, so
+    a near-duplicate is still found with a typo in one name or in the year.
+    Empty when the ID has no name token paired with a year, a zip or another name.
+    """
+    tokens = key.split()
+    names = sorted({soundex(t) for t in tokens if t.isalpha()})
+    years = {t for t in tokens if len(t) == 4 and t.isdigit() and t[:2] in ("19", "20")}
+    zips = {t[:3] for t in tokens if len(t) == 5 and t.isdigit()}
+    blocks = [f"{name}|y{year}" for name in names for year in years]
+    blocks += [f"{name}|z{zip3}" for name in names for zip3 in zips]
+    blocks += [f"{a}|{b}" for i, a in enumerate(names) for b in names[i + 1:]]
+    return blocks
 
- 
+
+class SponsorIndex:
+    """
+    Blocking index over the Sponsor_ID column of a sponsor table, built once and
+    reused for every intake record. Each row is filed under its blocking_keys;
+    a query only scores the rows of the blocks it shares (a small fraction of
+    the table) whose length could reach the threshold, in one
+    rapidfuzz.process.cdist call. query_many scores each block against all
+    the queries that fall into it with one cdist call per block.
+
+    IDs without blocking keys are never left to exact matching: such a row is
+    a candidate for every query, and such a query scans the whole table.
+    Blocking still trades some recall for speed: a pair scoring above the
+    threshold is missed when the typo changes the Soundex code of a name and
+    the two IDs share no other name code, year or zip prefix (e.g.
+    "ana gross 1965" vs "ana ross 1964").
+    """
+
+    def __init__(self, sponsor_df, field="Sponsor_ID"):
+        self.field = field
+
+        values = sponsor_df[field]
+        keep = values.notna().to_numpy()
+        self.ids = values[keep].astype(str).to_numpy()
+        self.keys = np.array([_normalize(v) for v in self.ids], dtype=object)
+        self.lengths = np.fromiter(map(len, self.keys), dtype=np.int64, count=len(self.keys))
+
+        block_of, row_of, unblocked = [], [], []
+        for row, key in enumerate(self.keys):
+            blocks = blocking_keys(key)
+            if not blocks:
+                unblocked.append(row)
+            block_of.extend(blocks)
+            row_of.extend([row] * len(blocks))
+        self.unblocked = np.array(unblocked, dtype=np.int64)
+        codes, names = pd.factorize(pd.Series(block_of, dtype=object))
+        order = np.argsort(codes, kind="stable")
+        rows = np.array(row_of, dtype=np.int64)[order]
+        bounds = np.searchsorted(codes[order], np.arange(len(names) + 1))
+        self.blocks = {name: rows[bounds[i]:bounds[i + 1]] for i, name in enumerate(names)}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _block_rows(self, key):
+        blocks = blocking_keys(key)
+        if not blocks:
+            return np.arange(len(self.keys))
+        found = [self.blocks[b] for b in blocks if b in self.blocks]
+        return np.unique(np.concatenate(found + [self.unblocked]))
+
+    def _length_ok(self, key, rows, threshold):
+        # fuzz.ratio = 100 * (1 - d / (la + lb)), so a match needs lb within these bounds.
+        la, ratio = len(key), threshold / 100.0
+        lengths = self.lengths[rows]
+        upper = la * (2 - ratio) / ratio if ratio > 0 else np.inf
+        return (lengths >= la * ratio / (2 - ratio)) & (lengths <= upper)
+
+    def candidates(self, key, threshold):
+        """Row positions sharing a block with a normalized key whose length could score above threshold."""
+        rows = self._block_rows(key)
+        return rows[self._length_ok(key, rows, threshold)]
+
+    def _matches(self, rows, scores, threshold):
+        scores = np.rint(scores).astype(np.int64)
+        matched = scores > threshold
+        return list(zip(self.ids[rows[matched]].tolist(), scores[matched].tolist()))
+
+    @timed("dedup_query")
+    def query(self, value, threshold=85):
+        """Return [(Sponsor_ID, score), ...] for indexed rows scoring above threshold."""
+        key = _normalize(value)
+        rows = self.candidates(key, threshold)
+        if len(rows) == 0:
+            return []
+        scores = process.cdist([key], self.keys[rows], scorer=fuzz.ratio, dtype=np.float64)[0]
+        return self._matches(rows, scores, threshold)
+
+    @timed("dedup_query_many")
+    def query_many(self, values, threshold=85):
+        """query for each value, scoring every block once against all the values that share it."""
+        keys = [_normalize(v) for v in values]
+        waiting = defaultdict(list)
+        for i, key in enumerate(keys):
+            blocks = blocking_keys(key)
+            # Unblocked queries scan the whole table; every query scans the unblocked rows.
+            for block in blocks if blocks else [None]:
+                if block is None or block in self.blocks:
+                    waiting[block].append(i)
+            if blocks and len(self.unblocked):
+                waiting[""].append(i)
+
+        scored = [{} for _ in keys]
+        for block, queries in waiting.items():
+            if block is None:
+                rows = np.arange(len(self.keys))
+            else:
+                rows = self.unblocked if block == "" else self.blocks[block]
+            scores = process.cdist([keys[i] for i in queries], self.keys[rows], scorer=fuzz.ratio, dtype=np.float64)
+            for i, row_scores in zip(queries, scores):
+                scored[i].update(zip(rows.tolist(), row_scores.tolist()))
+
+        results = []
+        for found in scored:
+            rows = np.array(sorted(found), dtype=np.int64)
+            scores = np.array([found[r] for r in rows.tolist()], dtype=np.float64)
+            results.append(self._matches(rows, scores, threshold))
+        return results
+
+
+def build_index(sponsor_df, field="Sponsor_ID"):
+    return SponsorIndex(sponsor_df, field=field)
+
+
+def deduplicate(sponsor_df, new_record, index=None):
+    """
+    Find sponsors whose Sponsor_ID fuzzy-matches new_record's (score > 85).
+    Pass a prebuilt index (see build_index) to avoid re-indexing sponsor_df per call.
+    """
+    if index is None:
+        index = build_index(sponsor_df)
+    return index.query(new_record["Sponsor_ID"])
+
+
+# Keys that mark two sponsor rows as the same person when any one matches exactly.
+# Names only count together with the date of birth: a shared first or last name
+# on its own would chain almost every row into a single cluster.
+DUPLICATE_KEYS = ["ssn", "email", "phone", "sponsor_id_hash", "fingerprint_hash", ("first_name", "last_name", "dob")]
+
+
+def _key_codes(df, key):
+    """Integer group code per row for a column or tuple of columns; -1 where any part is missing."""
+    if isinstance(key, tuple):
+        codes = df.groupby(list(key), sort=False, dropna=True, observed=True).ngroup()
+        return codes.fillna(-1).to_numpy(dtype=np.int64)
+    return pd.factorize(df[key])[0]
+
+
+@timed("duplicate_clusters")
+def duplicate_clusters(df, keys=DUPLICATE_KEYS):
+    """
+    Assign a cluster ID to every row so that rows sharing any key value
+    (directly or through other rows) get the same ID. Missing values never match.
+    Each key is grouped once and every row is linked to one anchor row with the
+    same value; connected components of those edges are the union-find clusters.
+    Runs in O(N log N) overall instead of one O(N) mask per lookup.
+    """
+    n = len(df)
+    rows = np.arange(n)
+    sources, targets = [rows], [rows]
+    for key in keys:
+        columns = key if isinstance(key, tuple) else (key,)
+        if not all(col in df.columns for col in columns):
+            continue
+        codes = _key_codes(df, key)
+        valid = codes >= 0
+        # Any row holding a value can anchor it; link every other holder to that row.
+        anchor = np.empty(codes.max(initial=-1) + 1, dtype=np.int64)
+        anchor[codes[valid]] = rows[valid]
+        sources.append(rows[valid])
+        targets.append(anchor[codes[valid]])
+
+    graph = coo_matrix(
+        (np.ones(sum(len(s) for s in sources), dtype=np.int32), (np.concatenate(sources), np.concatenate(targets))),
+        shape=(n, n),
+    )
+    _, labels = connected_components(graph, directed=False)
+    return labels
+
+
+def cluster_members(labels):
+    """Map each cluster ID to the row positions it contains."""
+    return pd.Series(labels).groupby(labels, sort=False).indices
+
+
+def duplicate_report(df, labels):
+    """All rows that belong to a cluster of two or more, grouped by cluster ID."""
+    sizes = np.bincount(labels)
+    report = df.assign(cluster_id=labels)[sizes[labels] > 1]
+    return report.sort_values("cluster_id", kind="stable")
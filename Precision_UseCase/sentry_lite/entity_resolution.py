@@ -0,0 +1,214 @@
+# sentry_lite/entity_resolution.py
+"""
+Bulk entity resolution over the identity (orange) columns of a sponsor table.
+
+    python -m sentry_lite.entity_resolution full_canonicalization_dataset_script_output.xlsx resolved.xlsx --workers 8
+
+1. Normalize first_name/last_name, dob, email, phone and ssn: names are
+   accent-folded, lowercased and token-sorted across both fields (so swapped
+   or merged name fields still agree), phones keep their last 10 digits without
+   extensions, ssn keeps its digits.
+2. Candidates: MinHash signatures of the normalized identity are banded (see
+   sentry_lite.identity_index), and rows sharing a band key become candidate
+   pairs; so do rows with the same normalized phone, ssn, email or name and
+   dob. The work grows with the number of near-duplicates rather than N^2.
+3. Scoring: a pair's score is the weighted mean of its per-field similarities
+   over the fields both rows have: token-sort ratio for names, equality for
+   the rest.
+4. Clustering: pairs scoring at least the threshold are joined with connected
+   components. The most complete row of each cluster is its canonical record,
+   and every other row is marked is_duplicate.
+
+Signatures and pair scores are computed on `workers` threads; NumPy and
+rapidfuzz release the GIL, so both steps scale with cores.
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from rapidfuzz import fuzz, process
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+from sentry_lite.datastore import read_table
+from sentry_lite.identity_index import NUM_PERM, band_keys, has_identity, identity_text, minhash_signatures
+from sentry_lite.tracing import timed
+
+RESOLUTION_FIELDS = ["name", "dob", "email", "phone", "ssn"]
+# ssn and the full name identify a person more strongly than contact details.
+FIELD_WEIGHTS = {"name": 2.0, "dob": 1.0, "email": 1.0, "phone": 1.0, "ssn": 2.0}
+MATCH_THRESHOLD = 0.75
+# Rows that agree exactly on one of these normalized keys are always compared,
+# whatever the rest of their identity text looks like.
+BLOCKING_KEYS = ["phone", "ssn", "email", ("name", "dob")]
+BANDS = 24  # 4 permutations per band: stricter than the intake index, the blocking keys catch the rest
+MAX_BUCKET = 100  # LSH buckets larger than this are too unspecific to pair exhaustively
+PAIR_CHUNK = 1_000_000
+
+
+def _text(df, col):
+    if col not in df.columns:
+        return pd.Series(pd.NA, index=df.index, dtype="string")
+    return df[col].astype("string")
+
+
+def _blank_to_na(values):
+    values = values.str.strip()
+    return values.mask(values == "")
+
+
+def _dates(values):
+    """Parse dates written in any format; ISO dates, the common case, take the fast vectorized path."""
+    dates = pd.to_datetime(values, errors="coerce", format="ISO8601")
+    retry = dates.isna() & values.notna()
+    if retry.any():
+        dates[retry] = pd.to_datetime(values[retry].astype(str), errors="coerce", format="mixed")
+    return dates
+
+
+def normalize_identities(df):
+    """The RESOLUTION_FIELDS of df as normalized strings (missing values as <NA>)."""
+    name = _text(df, "first_name").fillna("") + " " + _text(df, "last_name").fillna("")
+    name = name.str.normalize("NFKD").str.encode("ascii", errors="ignore").str.decode("ascii").astype("string")
+    name = name.str.lower().str.replace(r"[^a-z ]+", "", regex=True).str.split().map(sorted, na_action="ignore")
+    dob = _dates(df["dob"]) if "dob" in df.columns else pd.Series(pd.NaT, index=df.index)
+    phone = _text(df, "phone").str.replace(r"x.*$", "", regex=True).str.replace(r"\D", "", regex=True).str[-10:]
+    return pd.DataFrame({
+        "name": _blank_to_na(name.str.join(" ").astype("string")),
+        "dob": dob.dt.strftime("%Y-%m-%d").astype("string"),
+        "email": _blank_to_na(_text(df, "email").str.lower()),
+        "phone": _blank_to_na(phone),
+        "ssn": _blank_to_na(_text(df, "ssn").str.replace(r"\D", "", regex=True)),
+    }, index=df.index)
+
+
+def _bucket_pairs(keys, rows, max_bucket):
+    """(left, right) for every pair of rows whose sorted keys are equal, skipping buckets above max_bucket."""
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    sizes = np.diff(np.r_[starts, len(keys)])
+    bucket_size = np.repeat(sizes, sizes)
+    pairable = (bucket_size > 1) & (bucket_size <= max_bucket)
+    left, right = [], []
+    # Pair each element with the one `gap` places later in its bucket; in sorted
+    # order, once no bucket has such a partner no larger gap does either.
+    for gap in range(1, max_bucket):
+        hits = np.flatnonzero(pairable[:-gap] & (keys[:-gap] == keys[gap:]))
+        if len(hits) == 0:
+            break
+        left.append(rows[hits])
+        right.append(rows[hits + gap])
+    if not left:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    return np.concatenate(left), np.concatenate(right)
+
+
+def _encode_pairs(left, right, n):
+    return np.minimum(left, right) * n + np.maximum(left, right)
+
+
+@timed("er_candidates")
+def candidate_pairs(normalized, num_perm=NUM_PERM, bands=BANDS, max_bucket=MAX_BUCKET, workers=1,
+                    blocking=BLOCKING_KEYS):
+    """
+    Unique (left, right) row positions, left < right, of rows sharing at least
+    one LSH band of their identity text or one exact blocking key.
+    """
+    n = len(normalized)
+    signatures = minhash_signatures(identity_text(normalized, RESOLUTION_FIELDS), num_perm, workers=workers)
+    rows = np.flatnonzero(has_identity(signatures))
+    keys = band_keys(signatures[rows], bands)
+    encoded = []
+    for band in range(bands):
+        order = np.argsort(keys[:, band], kind="stable")
+        encoded.append(_encode_pairs(*_bucket_pairs(keys[order, band], rows[order], max_bucket), n))
+    for key in blocking:
+        columns = list(key) if isinstance(key, tuple) else [key]
+        codes = normalized[columns].groupby(columns, sort=False, dropna=True).ngroup().to_numpy()
+        keyed = np.flatnonzero(codes >= 0)
+        order = keyed[np.argsort(codes[keyed], kind="stable")]
+        encoded.append(_encode_pairs(*_bucket_pairs(codes[order], order, max_bucket), n))
+    encoded = np.unique(np.concatenate(encoded))
+    return encoded // n, encoded % n
+
+
+@timed("er_score_pairs")
+def score_pairs(normalized, left, right, workers=1):
+    """Weighted mean field similarity in [0, 1] of each (left, right) pair."""
+    scores = np.zeros(len(left))
+    for start in range(0, len(left), PAIR_CHUNK):
+        a, b = left[start:start + PAIR_CHUNK], right[start:start + PAIR_CHUNK]
+        total, weight = np.zeros(len(a)), np.zeros(len(a))
+        for field in RESOLUTION_FIELDS:
+            values = normalized[field].to_numpy(dtype=object, na_value=None)
+            va, vb = values[a], values[b]
+            both = np.flatnonzero(pd.notna(va) & pd.notna(vb))
+            if field == "name":
+                similarity = process.cpdist(va[both], vb[both], scorer=fuzz.token_sort_ratio, workers=workers) / 100.0
+            else:
+                similarity = va[both] == vb[both]
+            total[both] += FIELD_WEIGHTS[field] * similarity
+            weight[both] += FIELD_WEIGHTS[field]
+        scores[start:start + len(a)] = np.divide(total, weight, out=np.zeros(len(a)), where=weight > 0)
+    return scores
+
+
+@timed("entity_resolution")
+def resolve_entities(df, threshold=MATCH_THRESHOLD, workers=None, num_perm=NUM_PERM, bands=BANDS,
+                     max_bucket=MAX_BUCKET):
+    """
+    Cluster the rows of df that describe the same sponsor. Returns a DataFrame
+    aligned with df holding cluster_id and is_duplicate (True for every row of
+    a cluster except its most complete one; ties go to the last row).
+    """
+    workers = workers or os.cpu_count() or 1
+    n = len(df)
+    normalized = normalize_identities(df)
+    left, right = candidate_pairs(normalized, num_perm, bands, max_bucket, workers)
+    matched = score_pairs(normalized, left, right, workers) >= threshold
+
+    rows = np.arange(n)
+    graph = coo_matrix(
+        (np.ones(n + matched.sum(), dtype=np.int32),
+         (np.concatenate([rows, left[matched]]), np.concatenate([rows, right[matched]]))),
+        shape=(n, n),
+    )
+    _, labels = connected_components(graph, directed=False)
+
+    completeness = normalized.notna().sum(axis=1).to_numpy()
+    order = np.lexsort((rows, completeness, labels))
+    canonical = order[np.r_[labels[order][1:] != labels[order][:-1], True]]
+    is_duplicate = np.ones(n, dtype=bool)
+    is_duplicate[canonical] = False
+    return pd.DataFrame({"cluster_id": labels, "is_duplicate": is_duplicate}, index=df.index)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Recompute sponsor cluster IDs and is_duplicate with MinHash LSH.")
+    parser.add_argument("input", help="Sponsor table (Excel, Arrow IPC, Parquet or CSV)")
+    parser.add_argument("output", help="Destination .xlsx, .csv or .parquet")
+    parser.add_argument("--workers", type=int, default=None, help="Threads for hashing and pair scoring (default: one per core)")
+    parser.add_argument("--threshold", type=float, default=MATCH_THRESHOLD,
+                        help=f"Minimum pair score to merge two rows (default: {MATCH_THRESHOLD})")
+    parser.add_argument("--max-bucket", type=int, default=MAX_BUCKET, help="Skip LSH buckets with more rows than this")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    df = read_table(args.input)
+    resolved = resolve_entities(df, args.threshold, args.workers, max_bucket=args.max_bucket)
+    out = df.assign(cluster_id=resolved["cluster_id"], is_duplicate=resolved["is_duplicate"])
+    if args.output.endswith(".parquet"):
+        out.to_parquet(args.output, index=False)
+    elif args.output.endswith(".xlsx"):
+        out.to_excel(args.output, index=False)
+    else:
+        out.to_csv(args.output, index=False)
+    clusters = np.bincount(resolved["cluster_id"])
+    print(f"Resolved {len(df)} rows into {len(clusters)} sponsors ({(clusters > 1).sum()} with duplicates, "
+          f"{int(resolved['is_duplicate'].sum())} duplicate rows) in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
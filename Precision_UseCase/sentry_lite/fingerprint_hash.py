@@ -1,13 +1,62 @@
-# sentry_lite/fingerprint_hash.py 
+# sentry_lite/fingerprint_hash.py
 
-import hashlib 
+import hashlib
+import hmac
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 
-from datetime import datetime 
+# Environment variable holding the secret key for deterministic hashing.
+FINGERPRINT_KEY_ENV = "SENTRY_FINGERPRINT_KEY"
+CHUNK_SIZE = 1 << 20
+FINGERPRINT_EXTENSIONS = (".txt", ".pdf", ".png", ".jpg", ".jpeg")
 
- 
 
-def generate_sponsor_id(fingerprint_bytes: bytes) -> str: 
+def get_fingerprint_key(key=None) -> bytes:
+    """Return the HMAC key: the given one, else the SENTRY_FINGERPRINT_KEY environment variable."""
+    if key is None:
+        key = os.environ.get(FINGERPRINT_KEY_ENV)
+    if not key:
+        raise ValueError(f"Deterministic hashing needs a secret key; set {FINGERPRINT_KEY_ENV}")
+    return key.encode("utf-8") if isinstance(key, str) else key
 
-    salt = str(datetime.utcnow()).encode("utf-8") 
 
-    return hashlib.sha256(fingerprint_bytes + salt).hexdigest() 
\ No newline at end of file
+def generate_sponsor_id(fingerprint_bytes: bytes, deterministic: bool = False, key=None) -> str:
+    """
+    Hash fingerprint bytes into a sponsor ID.
+    By default the hash is salted with the current time, so it never repeats.
+    With deterministic=True it is an HMAC-SHA256 under the secret key, so the
+    same fingerprint always maps to the same ID and the column can be indexed.
+    """
+    if deterministic:
+        return hmac.new(get_fingerprint_key(key), fingerprint_bytes, hashlib.sha256).hexdigest()
+
+    salt = str(datetime.utcnow()).encode("utf-8")
+
+    return hashlib.sha256(fingerprint_bytes + salt).hexdigest()
+
+
+def hash_fingerprint_file(path, key=None, chunk_size=CHUNK_SIZE) -> str:
+    """Deterministic HMAC-SHA256 of a fingerprint file, read in fixed-size chunks."""
+    digest = hmac.new(get_fingerprint_key(key), digestmod=hashlib.sha256)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_fingerprint_directory(directory, key=None, max_workers=None, extensions=FINGERPRINT_EXTENSIONS) -> dict:
+    """
+    Hash every fingerprint file in a directory in parallel.
+    Returns {file name: hash}. hashlib releases the GIL while digesting,
+    so a thread pool keeps several cores busy without pickling file contents.
+    """
+    key = get_fingerprint_key(key)
+    names = sorted(
+        name for name in os.listdir(directory)
+        if name.lower().endswith(extensions) and os.path.isfile(os.path.join(directory, name))
+    )
+    paths = [os.path.join(directory, name) for name in names]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        hashes = executor.map(lambda path: hash_fingerprint_file(path, key), paths)
+        return dict(zip(names, hashes))
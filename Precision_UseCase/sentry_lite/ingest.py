@@ -0,0 +1,36 @@
+# sentry_lite/ingest.py
+"""
+Convert the Excel inputs into Arrow IPC files that the loaders prefer.
+
+    python -m sentry_lite.ingest                 # convert the bundled workbooks
+    python -m sentry_lite.ingest path/to/file.xlsx ...
+"""
+
+import argparse
+import os
+
+from sentry_lite.datastore import convert_workbook
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_WORKBOOKS = [
+    os.path.join(PROJECT_DIR, "data", "Synthetic Sponsor Risk Population -March 31 2025 -acb.xlsx"),
+    os.path.join(PROJECT_DIR, "synthetic data for ACF precision forum demo -april 14 2025 -acb.xlsx"),
+    os.path.join(PROJECT_DIR, "..", "Precision_Dashboard", "full_canonicalization_dataset_script_output.xlsx"),
+]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert Excel workbooks to memory-mappable Arrow IPC files.")
+    parser.add_argument("workbooks", nargs="*", help="Workbooks to convert (default: the bundled datasets)")
+    args = parser.parse_args(argv)
+
+    for workbook in args.workbooks or DEFAULT_WORKBOOKS:
+        if not os.path.exists(workbook):
+            print(f"Skipping missing workbook: {workbook}")
+            continue
+        print(f"Wrote {convert_workbook(workbook)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+# sentry_lite/lookup.py
+
+import numpy as np
+
+# Identity columns that get an exact-match hash index.
+LOOKUP_KEYS = ("fingerprint_hash", "ssn", "email", "phone")
+
+_EMPTY = np.empty(0, dtype=np.int64)
+
+
+class RecordIndex:
+    """
+    Hash indexes from identity values to row positions in a sponsor table.
+    Built once when the table is loaded; each lookup is a dict access instead of
+    a boolean-mask scan over every row.
+    """
+
+    def __init__(self, df, keys=LOOKUP_KEYS):
+        self.df = df
+        self.indexes = {}
+        for key in keys:
+            if key in df.columns:
+                # groupby().indices maps each distinct non-null value to its row positions.
+                self.indexes[key] = df.groupby(key, sort=False).indices
+
+    def positions(self, key, value):
+        """Row positions whose key column equals value (empty if none or not indexed)."""
+        if key not in self.indexes:
+            raise KeyError(f"Column '{key}' is not indexed")
+        return self.indexes[key].get(value, _EMPTY)
+
+    def lookup(self, key, value):
+        """Rows whose key column equals value, same as df[df[key] == value]."""
+        return self.df.iloc[self.positions(key, value)]
+
+    def lookup_fingerprint(self, fingerprint_hash):
+        return self.lookup("fingerprint_hash", fingerprint_hash)
@@ -0,0 +1,79 @@
+# sentry_lite/model_store.py
+"""
+Native XGBoost model storage. sentry_lite.resources.load_model is the
+process-wide, thread-safe accessor: it loads each model once (the .ubj copy
+when it is current) and shares it between threads.
+
+    python -m sentry_lite.model_store models/sar_model.pkl   # writes models/sar_model.ubj
+"""
+
+import argparse
+import os
+
+import joblib
+import numpy as np
+import xgboost as xgb
+
+NATIVE_SUFFIX = ".ubj"
+
+
+def native_path(model_path):
+    """Location of the UBJSON copy of a model: same directory and name, .ubj suffix."""
+    return os.path.splitext(model_path)[0] + NATIVE_SUFFIX
+
+
+def save_native(model, path):
+    """Save the booster of a fitted XGBRegressor (or a Booster) in XGBoost's UBJSON format."""
+    booster = model.get_booster() if hasattr(model, "get_booster") else model
+    booster.save_model(path)
+    return path
+
+
+class NativeModel:
+    """
+    Booster loaded from UBJSON and scored with Booster.inplace_predict.
+    Exposes predict() and get_booster() like XGBRegressor, so it can be passed
+    anywhere risk_model expects a model, but skips the sklearn wrapper and its
+    DataFrame validation. inplace_predict is safe to call from several threads.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.booster = xgb.Booster()
+        self.booster.load_model(path)
+        best_iteration = self.booster.attr("best_iteration")
+        self.iteration_range = (0, int(best_iteration) + 1) if best_iteration is not None else (0, 0)
+
+    def get_booster(self):
+        return self.booster
+
+    def predict(self, X):
+        if not hasattr(X, "columns"):
+            X = np.ascontiguousarray(X, dtype=np.float32)
+        return self.booster.inplace_predict(X, iteration_range=self.iteration_range, validate_features=False)
+
+
+def resolve_model_source(model_path):
+    """
+    Return the model file to load for model_path: its .ubj copy when it exists
+    and is at least as new as the pickle, otherwise model_path itself.
+    """
+    ubj_path = native_path(model_path)
+    if model_path.endswith(NATIVE_SUFFIX):
+        return model_path
+    if os.path.exists(ubj_path) and (
+        not os.path.exists(model_path) or os.path.getmtime(ubj_path) >= os.path.getmtime(model_path)
+    ):
+        return ubj_path
+    return model_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert a pickled XGBRegressor into XGBoost's native UBJSON format.")
+    parser.add_argument("model", nargs="?", default="models/sar_model.pkl", help="Pickled model (default: models/sar_model.pkl)")
+    args = parser.parse_args(argv)
+    print(f"Wrote {save_native(joblib.load(args.model), native_path(args.model))}")
+
+
+if __name__ == "__main__":
+    main()
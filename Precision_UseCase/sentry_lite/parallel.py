@@ -0,0 +1,137 @@
+# sentry_lite/parallel.py
+"""
+Score a sponsor table across CPU cores.
+
+    python -m sentry_lite.parallel sponsors.parquet scored.parquet --workers 32
+
+The table is shared with the workers as one uncompressed Arrow IPC file that
+every worker memory-maps, so each task only sends (start, stop) row offsets and
+gets back its float32 scores. Each worker loads the model and pipeline once in
+its initializer and limits XGBoost to its share of the cores.
+"""
+
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.feather as feather
+from concurrent.futures import ProcessPoolExecutor
+
+from sentry_lite.datastore import COLUMNAR_SUFFIX, arrow_schema, normalize_dtypes, read_table, resolve_source
+from sentry_lite.pipeline import PIPELINE_PATH
+from sentry_lite.resources import load_model
+from sentry_lite.risk_model import predict_risk_batch
+from sentry_lite.score_file import SCORE_COLUMN
+
+_worker = {}
+
+
+def _limit_threads(model, n_threads):
+    """Cap XGBoost's OpenMP threads so workers * threads does not oversubscribe the machine."""
+    if hasattr(model, "set_params"):
+        model.set_params(n_jobs=n_threads)
+    else:
+        model.get_booster().set_param({"nthread": n_threads})
+
+
+def _init_worker(arrow_path, model_path, pipeline_path, n_threads):
+    model = load_model(model_path)
+    _limit_threads(model, n_threads)
+    _worker["model"] = model
+    _worker["pipeline"] = load_model(pipeline_path) if pipeline_path and os.path.exists(pipeline_path) else None
+    # The memory map stays open for the worker's lifetime; slices of it are zero-copy.
+    _worker["table"] = pa.ipc.open_file(pa.memory_map(arrow_path, "r")).read_all()
+
+
+def _score_range(start, stop):
+    records = _worker["table"].slice(start, stop - start).to_pandas()
+    return start, np.asarray(predict_risk_batch(records, _worker["model"], _worker["pipeline"]), dtype=np.float32)
+
+
+def _shared_arrow_file(data, tmp_dir):
+    """Return an Arrow IPC path holding data, writing one to tmp_dir only if needed."""
+    if isinstance(data, str):
+        source = resolve_source(data)
+        if source.endswith((COLUMNAR_SUFFIX, ".feather")):
+            return source
+        data = read_table(source)
+    df = normalize_dtypes(data)
+    path = os.path.join(tmp_dir, "shared" + COLUMNAR_SUFFIX)
+    feather.write_feather(pa.Table.from_pandas(df, schema=arrow_schema(df), preserve_index=False),
+                          path, compression="uncompressed")
+    return path
+
+
+def _score_arrow_file(arrow_path, model_path, pipeline_path, workers, partition_rows):
+    """score_parallel for a table already written as an Arrow IPC file."""
+    workers = workers or os.cpu_count() or 1
+    n_threads = max(1, (os.cpu_count() or 1) // workers)
+    model_path = os.path.abspath(model_path)
+    pipeline_path = os.path.abspath(pipeline_path) if pipeline_path else None
+
+    with pa.memory_map(arrow_path, "r") as mapped:
+        n_rows = pa.ipc.open_file(mapped).read_all().num_rows
+    scores = np.empty(n_rows, dtype=np.float32)
+    if n_rows == 0:
+        return scores
+    bounds = [(start, min(start + partition_rows, n_rows)) for start in range(0, n_rows, partition_rows)]
+
+    # spawn, not fork: forking a parent that already started OpenMP threads can deadlock XGBoost.
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(arrow_path, model_path, pipeline_path, n_threads),
+    ) as pool:
+        for start, part in pool.map(_score_range, *zip(*bounds)):
+            scores[start:start + len(part)] = part
+    return scores
+
+
+def score_parallel(data, model_path="models/sar_model.pkl", pipeline_path=PIPELINE_PATH,
+                   workers=None, partition_rows=50_000):
+    """
+    Score data (a DataFrame or a table path) with a ProcessPoolExecutor of
+    `workers` processes (default: one per core). Rows are split into
+    partitions of at most partition_rows and the scores are merged back in
+    the original row order. Returns a float32 array with one score per row.
+    Workers are spawned, so scripts calling this need an `if __name__ == "__main__":` guard.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        arrow_path = _shared_arrow_file(data, tmp_dir)
+        return _score_arrow_file(arrow_path, model_path, pipeline_path, workers, partition_rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a sponsor table in parallel across processes.")
+    parser.add_argument("input", help="Arrow IPC, Parquet, CSV or Excel (with an ingested .arrow copy) file")
+    parser.add_argument("output", help="Destination .csv or .parquet")
+    parser.add_argument("--model", default="models/sar_model.pkl")
+    parser.add_argument("--pipeline", default=PIPELINE_PATH)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per core)")
+    parser.add_argument("--partition-rows", type=int, default=50_000, help="Rows per task (default: 50000)")
+    parser.add_argument("--columns", nargs="+", help="Input columns to carry into the output (default: all)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # The Arrow file the workers scored also supplies the output columns, so the input is parsed once.
+        arrow_path = _shared_arrow_file(args.input, tmp_dir)
+        scores = _score_arrow_file(arrow_path, args.model, args.pipeline, args.workers, args.partition_rows)
+        with pa.memory_map(arrow_path, "r") as mapped:
+            table = pa.ipc.open_file(mapped).read_all()
+            out = (table.select(args.columns) if args.columns else table).to_pandas()
+    out[SCORE_COLUMN] = scores
+    if args.output.endswith(".parquet"):
+        out.to_parquet(args.output, index=False)
+    else:
+        out.to_csv(args.output, index=False)
+    print(f"Scored {len(scores)} rows into {args.output} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+# sentry_lite/pipeline.py
+
+import numpy as np
+import pandas as pd
+
+PIPELINE_PATH = "models/sar_pipeline.pkl"
+
+# Translate app-facing input values into the vocabulary of the training workbook.
+# Values not listed are passed through unchanged.
+INPUT_MAPS = {
+    "Family_Ties_Status": {"Verified": 1, "Unverified": 0, "Unknown": 0},
+    "Gender": {"M": 1, "Male": 1, "F": 0, "Female": 0},
+}
+
+
+def _as_columns(records):
+    """Return ({column: ndarray}, n_rows) for a list of records or a DataFrame."""
+    if not isinstance(records, pd.DataFrame):
+        records = pd.DataFrame(list(records))
+    return {str(col): records[col].to_numpy() for col in records.columns}, len(records)
+
+
+def _to_float(value, default):
+    try:
+        result = float(value)
+    except (TypeError, ValueError):
+        return default
+    return default if np.isnan(result) else result
+
+
+class FeaturePipeline:
+    """
+    Fitted preprocessing for the SAR model: per-column label encoders, the
+    standard scaler, and the training column order and dtypes. Label-encoded
+    columns that were numeric in training are cast back to their training
+    dtype before lookup, so 1, 1.0, "1" and True all find the class 1.
+    Saved next to the model by train_model and applied at inference with
+    precompiled lookup tables (pandas Index hash tables and NumPy arrays),
+    so scoring does no per-call dict building or DataFrame reconstruction.
+    """
+
+    def __init__(self, label_columns):
+        self.label_columns = list(label_columns)
+
+    def fit(self, X):
+        """Fit encoders and scaler on the raw training features (after create_interaction_features)."""
+        self.columns = [str(col) for col in X.columns]
+        self.dtypes = {str(col): str(dtype) for col, dtype in X.dtypes.items()}
+        # Missing or unseen values are imputed with the most frequent training value.
+        self.fill_values = {str(col): X[col].mode().iloc[0] for col in X.columns}
+        # One encoder per column; classes are sorted exactly as LabelEncoder sorts them.
+        self.encoders = {col: pd.Index(np.sort(X[col].unique())) for col in self.label_columns}
+
+        encoded = self.encode(X)
+        self.mean_ = encoded.mean(axis=0)
+        scale = encoded.std(axis=0)
+        self.scale_ = np.where(scale == 0, 1.0, scale)
+        return self
+
+    def fit_stream(self, make_chunks):
+        """
+        fit() over data too large to hold at once. make_chunks() must return a fresh
+        iterable of raw feature DataFrames on every call; it is read twice, first to
+        count values (for modes and encoder classes), then to accumulate the encoded
+        mean and standard deviation. Memory is bounded by the chunk size and the
+        number of distinct values per column.
+        """
+        counts, has_nan, self.dtypes = {}, {}, None
+        for X in make_chunks():
+            if self.dtypes is None:
+                self.columns = [str(col) for col in X.columns]
+                self.dtypes = {str(col): str(dtype) for col, dtype in X.dtypes.items()}
+            for col in self.columns:
+                chunk_counts = X[col].value_counts()
+                counts[col] = chunk_counts if col not in counts else counts[col].add(chunk_counts, fill_value=0)
+                has_nan[col] = has_nan.get(col, False) or bool(X[col].isna().any())
+
+        # mode().iloc[0] picks the smallest of the most frequent values; do the same.
+        self.fill_values = {col: np.sort(c.index[c == c.max()].to_numpy())[0] for col, c in counts.items()}
+        self.encoders = {}
+        for col in self.label_columns:
+            classes = np.sort(counts[col].index.to_numpy())
+            self.encoders[col] = pd.Index(np.append(classes, np.nan) if has_nan[col] else classes)
+
+        n_rows, total, total_sq = 0, 0.0, 0.0
+        for X in make_chunks():
+            encoded = self.encode(X)
+            n_rows += len(encoded)
+            total = total + encoded.sum(axis=0)
+            total_sq = total_sq + np.square(encoded).sum(axis=0)
+        self.mean_ = total / n_rows
+        scale = np.sqrt(np.maximum(total_sq / n_rows - np.square(self.mean_), 0))
+        self.scale_ = np.where(scale == 0, 1.0, scale)
+        return self
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop("_maps", None)
+        state.pop("_tables", None)
+        state.pop("_fill_codes", None)
+        state.pop("_casts", None)
+        return state
+
+    def _label_casts(self):
+        # Training dtype of each label-encoded column that was numeric (int, float or bool).
+        if not hasattr(self, "_casts"):
+            self._casts = {
+                col: np.dtype(self.dtypes[col]) for col in self.encoders
+                if col in self.dtypes and pd.api.types.is_numeric_dtype(self.dtypes[col])
+            }
+        return self._casts
+
+    def _code_tables(self):
+        # Plain dict versions of the encoders for the single-record path.
+        if not hasattr(self, "_tables"):
+            self._tables = {col: {value: code for code, value in enumerate(index)} for col, index in self.encoders.items()}
+            self._fill_codes = {col: self._tables[col].get(self.fill_values[col], 0) for col in self.encoders}
+        return self._tables
+
+    def _encode_record(self, record):
+        """encode() for one record dict, using dict lookups instead of array operations."""
+        tables = self._code_tables()
+        casts = self._label_casts()
+        raw = {}
+        for col in self.columns:
+            value = record.get(col)
+            if value is None or (isinstance(value, float) and np.isnan(value)):
+                value = self.fill_values[col]
+            value = INPUT_MAPS[col].get(value, value) if col in INPUT_MAPS else value
+            if col in casts:
+                value = casts[col].type(_to_float(value, float(self.fill_values[col])))
+            raw[col] = value
+
+        if "High_Risk_Indicators" in self.columns and "High_Risk_Indicators" not in record:
+            raw["High_Risk_Indicators"] = _to_float(raw["Past_Denials"], 0) > 0 and _to_float(raw["Criminal_History"], 0) > 0
+
+        row = np.empty((1, len(self.columns)), dtype=np.float64)
+        for j, col in enumerate(self.columns):
+            if col in tables:
+                row[0, j] = tables[col].get(raw[col], self._fill_codes[col])
+            else:
+                row[0, j] = _to_float(raw[col], float(self.fill_values[col]))
+        return row
+
+    def _input_maps(self):
+        # Built from INPUT_MAPS on first use rather than pickled with the pipeline.
+        if not hasattr(self, "_maps"):
+            self._maps = {
+                col: (pd.Index(list(mapping)), np.array(list(mapping.values()), dtype=object))
+                for col, mapping in INPUT_MAPS.items()
+            }
+        return self._maps
+
+    def encode(self, records):
+        """Label-encode records into a float64 matrix in training column order (unscaled)."""
+        if isinstance(records, dict):
+            return self._encode_record(records)
+        columns, n_rows = _as_columns(records)
+        maps = self._input_maps()
+
+        raw = {}
+        for col in self.columns:
+            values = columns.get(col)
+            if values is None:
+                values = np.full(n_rows, self.fill_values[col], dtype=object)
+            else:
+                values = np.where(pd.isna(values), self.fill_values[col], values.astype(object))
+            if col in maps:
+                keys, targets = maps[col]
+                pos = keys.get_indexer(values)
+                values = np.where(pos >= 0, targets[pos], values)
+            raw[col] = values
+
+        # Interaction feature, as create_interaction_features computes it for training.
+        if "High_Risk_Indicators" in self.columns and "High_Risk_Indicators" not in columns:
+            denials = pd.to_numeric(raw["Past_Denials"], errors="coerce")
+            criminal = pd.to_numeric(raw["Criminal_History"], errors="coerce")
+            raw["High_Risk_Indicators"] = ((denials > 0) & (criminal > 0)).astype(object)
+
+        encoded = np.empty((n_rows, len(self.columns)), dtype=np.float64)
+        casts = self._label_casts()
+        for j, col in enumerate(self.columns):
+            values = raw[col]
+            if col in casts:
+                numeric = pd.to_numeric(values, errors="coerce").astype(np.float64)
+                values = np.where(np.isnan(numeric), float(self.fill_values[col]), numeric).astype(casts[col])
+            if col in self.encoders:
+                index = self.encoders[col]
+                codes = index.get_indexer(values)
+                if (codes < 0).any():
+                    codes[codes < 0] = index.get_indexer([self.fill_values[col]])[0]
+                encoded[:, j] = codes
+            else:
+                numeric = pd.to_numeric(values, errors="coerce").astype(np.float64)
+                encoded[:, j] = np.where(np.isnan(numeric), float(self.fill_values[col]), numeric)
+        return encoded
+
+    def transform(self, records):
+        """Encode and scale records into a contiguous float32 matrix ready for the model."""
+        return np.ascontiguousarray((self.encode(records) - self.mean_) / self.scale_, dtype=np.float32)
@@ -0,0 +1,125 @@
+# sentry_lite/registry.py
+"""
+Process-wide registry of read-only datasets shared by every session.
+
+A dataset is loaded once per process (and again only when its signature, e.g.
+the source file's mtime and size, changes). Sessions keep a DatasetHandle in
+st.session_state instead of a DataFrame, so memory stays flat as the number of
+sessions grows. A handle's edits are copy-on-write: the first edit to a column
+copies that column for the handle alone, and every other column stays shared.
+"""
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+_datasets = {}  # name -> {"signature": ..., "frame": DataFrame, "derived": {derivation: (key, value)}}
+_lock = threading.RLock()
+
+
+def register(name, loader, signature=None):
+    """
+    Return the shared frame for name, calling loader() to (re)load it only when
+    it is not registered yet or was registered with a different signature.
+    """
+    with _lock:
+        entry = _datasets.get(name)
+        if entry is None or entry["signature"] != signature:
+            entry = _datasets[name] = {"signature": signature, "frame": loader(), "derived": {}}
+        return entry["frame"]
+
+
+def get(name):
+    """The shared frame registered under name. Treat it as read-only."""
+    return _datasets[name]["frame"]
+
+
+def signature(name):
+    return _datasets[name]["signature"]
+
+
+def _derivation(key):
+    # ("risk_scores", model_version, ...) and "risk_scores" both name the "risk_scores" derivation.
+    return key[0] if isinstance(key, tuple) else key
+
+
+def derive(name, key, compute):
+    """
+    Return compute(frame) for dataset name, computed once per loaded version and
+    shared like the dataset itself (e.g. duplicate clusters of a sponsor table).
+    Only the latest key of each derivation is kept, so a new model version
+    replaces the scores of the old one instead of adding to them. compute runs
+    outside the registry lock; two sessions missing at once may both compute,
+    and the first result stored is the one every session gets.
+    """
+    derivation = _derivation(key)
+    with _lock:
+        entry = _datasets[name]
+        cached = entry["derived"].get(derivation)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    value = compute(entry["frame"])
+    with _lock:
+        cached = entry["derived"].get(derivation)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        # A result for a frame that was reloaded meanwhile is returned but not stored.
+        if _datasets.get(name) is entry:
+            entry["derived"][derivation] = (key, value)
+    return value
+
+
+class DatasetHandle:
+    """
+    A session's reference to a registered dataset: optionally a subset of its
+    columns and/or row positions, plus the session's own edited columns.
+    frame() assembles a DataFrame from the shared column arrays without copying
+    them; change data only through set_column / set_value, never in place.
+    """
+
+    def __init__(self, name, columns=None, rows=None):
+        self.name = name
+        self.columns = list(columns) if columns is not None else None
+        self.rows = np.asarray(rows, dtype=np.int64) if rows is not None else None
+        self.signature = signature(name)
+        self._edits = {}
+
+    def _shared(self):
+        shared = get(self.name)
+        if signature(self.name) != self.signature:
+            # The dataset was reloaded; edits made against the old version no longer line up.
+            self._edits.clear()
+            self.signature = signature(self.name)
+        return shared
+
+    def frame(self):
+        shared = self._shared()
+        if self.columns is None:
+            # All shared columns, plus any this handle added with set_column.
+            columns = list(shared.columns) + [col for col in self._edits if col not in shared.columns]
+        else:
+            columns = [col for col in self.columns if col in shared.columns or col in self._edits]
+        frame = pd.DataFrame({col: self._edits.get(col, shared.get(col)) for col in columns}, copy=False)
+        return frame if self.rows is None else frame.iloc[self.rows]
+
+    def set_column(self, column, values):
+        """Replace a whole column for this handle only; values are aligned to the full dataset."""
+        shared = self._shared()
+        self._edits[column] = pd.Series(values, index=shared.index, name=column)
+
+    def set_value(self, position, column, value):
+        """Set one cell (position is a row position in the full dataset) for this handle only."""
+        shared = self._shared()
+        edited = self._edits.get(column)
+        if edited is None:
+            edited = self._edits[column] = shared[column].copy()
+        edited.iloc[position] = value
+
+    def reset(self):
+        """Drop this handle's edits and go back to the shared data."""
+        self._edits.clear()
+
+    def __len__(self):
+        return len(self.rows) if self.rows is not None else len(get(self.name))
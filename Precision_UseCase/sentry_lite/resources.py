@@ -0,0 +1,157 @@
+# sentry_lite/resources.py
+
+import functools
+import os
+import threading
+
+import joblib
+
+from sentry_lite import registry
+from sentry_lite.datastore import read_table, resolve_source
+from sentry_lite.identity_index import IdentityIndex
+from sentry_lite.lookup import RecordIndex
+from sentry_lite.model_store import NATIVE_SUFFIX, NativeModel, resolve_model_source
+from sentry_lite.score_cache import ScoreCache
+from sentry_lite.sponsor_table import compact_sponsor_table
+
+try:
+    import streamlit as st
+except ImportError:  # Allow use from scripts and services without Streamlit installed
+    st = None
+
+
+def _cache_resource(func):
+    """
+    Share one instance per process: st.cache_resource inside Streamlit, a locked
+    lru_cache elsewhere. Like st.cache_resource, the lock makes concurrent first
+    calls (e.g. from the scoring service's worker threads) load the resource once.
+    """
+    if st is not None:
+        return st.cache_resource(max_entries=8, show_spinner=False)(func)
+    cached = functools.lru_cache(maxsize=8)(func)
+    lock = threading.RLock()
+
+    @functools.wraps(func)
+    def load(*args):
+        with lock:
+            return cached(*args)
+
+    return load
+
+
+def _cache_data(func):
+    """Cache serializable results: st.cache_data inside Streamlit, lru_cache elsewhere."""
+    if st is not None:
+        return st.cache_data(max_entries=8, show_spinner=False)(func)
+    return functools.lru_cache(maxsize=8)(func)
+
+
+def file_signature(path):
+    """
+    Identify the current version of a file by (mtime, size).
+    Cached loaders take it as an argument, so editing the file triggers a reload.
+    """
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+@_cache_resource
+def _load_model(path, signature):
+    if path.endswith(NATIVE_SUFFIX):
+        return NativeModel(path)
+    return joblib.load(path)
+
+
+@_cache_data
+def _load_table(path, signature):
+    return read_table(path)
+
+
+@_cache_resource
+def _load_record_index(path, signature):
+    return RecordIndex(read_table(path))
+
+
+@_cache_resource
+def _load_identity_index(path, signature):
+    return IdentityIndex(read_table(path))
+
+
+@_cache_data
+def _load_hash_list(path, signature):
+    with open(path, "rb") as f:
+        raw = f.read()
+    # Exports come from Windows machines too; latin-1 decodes any byte, so it always succeeds.
+    for encoding in ("utf-8", "cp1252", "latin-1"):
+        try:
+            return raw.decode(encoding).split(",")
+        except UnicodeDecodeError:
+            continue
+
+
+def load_model(path):
+    """
+    Load a joblib model once per process, reloading only when the file changes.
+    Uses the model's native .ubj copy instead when one is up to date (see sentry_lite.model_store).
+    """
+    path = resolve_model_source(os.path.abspath(path))
+    return _load_model(path, file_signature(path))
+
+
+def load_excel(path):
+    """
+    Read an Excel workbook once, reloading only when the file changes.
+    Uses the workbook's Arrow copy instead when one is up to date (see sentry_lite.ingest).
+    """
+    path = os.path.abspath(path)
+    return _load_table(path, file_signature(resolve_source(path)))
+
+
+def load_record_index(path, name=None):
+    """
+    Load a sponsor table together with its fingerprint/ssn/email/phone hash index.
+    Built once per process and shared by every session until the file changes.
+    With a name, the table is also registered in sentry_lite.registry so sessions
+    can hold DatasetHandles to rows of it.
+    """
+    path = os.path.abspath(path)
+    signature = file_signature(resolve_source(path))
+    index = _load_record_index(path, signature)
+    if name is not None:
+        registry.register(name, lambda: index.df, signature)
+    return index
+
+
+def load_identity_index(path):
+    """
+    Load the MinHash LSH identity index (see sentry_lite.identity_index) of a
+    sponsor table, built once per process and rebuilt only when the file changes.
+    """
+    path = os.path.abspath(path)
+    return _load_identity_index(path, file_signature(resolve_source(path)))
+
+
+def load_sponsor_table(path, name):
+    """
+    Register the compact sponsor table (see sentry_lite.sponsor_table) under name
+    in the shared registry, loading it once per process and again only when the
+    file changes. Returns the shared frame; sessions should keep DatasetHandles.
+    """
+    path = os.path.abspath(path)
+    return registry.register(name, lambda: compact_sponsor_table(read_table(path)), file_signature(resolve_source(path)))
+
+
+def load_hash_list(path):
+    """Read a comma-separated list of fingerprint hashes such as fig_hast.txt (UTF-8, cp1252 or latin-1)."""
+    path = os.path.abspath(path)
+    return _load_hash_list(path, file_signature(path))
+
+
+@_cache_resource
+def load_score_cache(maxsize=4096, ttl=None):
+    """
+    Process-wide ScoreCache shared by every session, so re-scoring an unchanged
+    sponsor on a rerun is a dictionary lookup. Set SENTRY_SCORE_CACHE to a file
+    path to add the SQLite tier shared between processes.
+    """
+    return ScoreCache(maxsize=maxsize, ttl=ttl)
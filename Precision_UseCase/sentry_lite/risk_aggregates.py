@@ -0,0 +1,119 @@
+# sentry_lite/risk_aggregates.py
+"""
+Running county and state risk aggregates for the dashboard heat map.
+
+    aggregates = RiskAggregates()
+    aggregates.add(purple_data["county"], risk_scores)   # as sponsors are scored
+    aggregates.state_table()                             # State, State_Abbr, count, sum, mean
+
+County strings such as "Douglas County, Nevada" are split into county and
+state with a vectorized str.split, once per distinct value, when they are first
+added. Each county keeps the count, sum and histogram of its scores, and the
+state aggregates are sums over its counties. Reading either costs
+O(number of counties) however many sponsors have been scored.
+"""
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+HISTOGRAM_EDGES = np.linspace(0, 100, 11)  # ten 10-point bins; scores outside [0, 100] go to the end bins
+UNKNOWN = "Unknown"
+
+STATE_ABBREVIATIONS = {
+    "Alabama": "AL", "Alaska": "AK", "Arizona": "AZ", "Arkansas": "AR", "California": "CA", "Colorado": "CO",
+    "Connecticut": "CT", "Delaware": "DE", "District of Columbia": "DC", "Florida": "FL", "Georgia": "GA",
+    "Hawaii": "HI", "Idaho": "ID", "Illinois": "IL", "Indiana": "IN", "Iowa": "IA", "Kansas": "KS",
+    "Kentucky": "KY", "Louisiana": "LA", "Maine": "ME", "Maryland": "MD", "Massachusetts": "MA",
+    "Michigan": "MI", "Minnesota": "MN", "Mississippi": "MS", "Missouri": "MO", "Montana": "MT",
+    "Nebraska": "NE", "Nevada": "NV", "New Hampshire": "NH", "New Jersey": "NJ", "New Mexico": "NM",
+    "New York": "NY", "North Carolina": "NC", "North Dakota": "ND", "Ohio": "OH", "Oklahoma": "OK",
+    "Oregon": "OR", "Pennsylvania": "PA", "Rhode Island": "RI", "South Carolina": "SC", "South Dakota": "SD",
+    "Tennessee": "TN", "Texas": "TX", "Utah": "UT", "Vermont": "VT", "Virginia": "VA", "Washington": "WA",
+    "West Virginia": "WV", "Wisconsin": "WI", "Wyoming": "WY",
+}
+
+
+def parse_counties(values):
+    """
+    Split "County, State" strings into a County and a State column.
+    Values without a comma get State "Unknown"; missing values are "Unknown" in both.
+    """
+    values = pd.Series(values, dtype="string").reset_index(drop=True)
+    parts = values.str.split(",", expand=True)
+    county = parts[0].str.strip() if parts.shape[1] > 0 else values
+    state = parts[1].str.strip() if parts.shape[1] > 1 else pd.Series(pd.NA, index=values.index, dtype="string")
+    return pd.DataFrame({"County": county.fillna(UNKNOWN), "State": state.fillna(UNKNOWN)})
+
+
+class RiskAggregates:
+    """Thread-safe running count, sum and histogram of risk scores per county; see the module docstring."""
+
+    def __init__(self, edges=HISTOGRAM_EDGES):
+        self.edges = np.asarray(edges, dtype=np.float64)
+        self._rows = {}  # raw county value -> row in the arrays below
+        self._places = pd.DataFrame({"County": pd.Series(dtype="string"), "State": pd.Series(dtype="string")})
+        self._count = np.zeros(0, dtype=np.int64)
+        self._sum = np.zeros(0, dtype=np.float64)
+        self._hist = np.zeros((0, len(self.edges) - 1), dtype=np.int64)
+        self._lock = threading.Lock()
+
+    def _row_codes(self, counties):
+        """Row of each county value, parsing and adding the values not seen before."""
+        codes, uniques = pd.factorize(pd.Series(counties))
+        # Missing values get code -1, which indexes this trailing UNKNOWN.
+        uniques = list(uniques) + [UNKNOWN]
+        new = [value for value in uniques if value not in self._rows]
+        if new:
+            start = len(self._places)
+            self._rows.update((value, start + i) for i, value in enumerate(new))
+            self._places = pd.concat([self._places, parse_counties(new)], ignore_index=True)
+            self._count = np.concatenate([self._count, np.zeros(len(new), dtype=np.int64)])
+            self._sum = np.concatenate([self._sum, np.zeros(len(new))])
+            self._hist = np.concatenate([self._hist, np.zeros((len(new), self._hist.shape[1]), dtype=np.int64)])
+        return np.array([self._rows[value] for value in uniques], dtype=np.int64)[codes]
+
+    def add(self, counties, scores):
+        """Add one score per county value (arrays or Series of equal length). Returns self."""
+        scores = np.asarray(scores, dtype=np.float64)
+        n_bins = len(self.edges) - 1
+        bins = np.clip(np.searchsorted(self.edges, scores, side="right") - 1, 0, n_bins - 1)
+        with self._lock:
+            rows = self._row_codes(counties)
+            n_rows = len(self._places)
+            self._count += np.bincount(rows, minlength=n_rows)
+            self._sum += np.bincount(rows, weights=scores, minlength=n_rows)
+            self._hist += np.bincount(rows * n_bins + bins, minlength=n_rows * n_bins).reshape(n_rows, n_bins)
+        return self
+
+    def reset(self):
+        with self._lock:
+            self._count[:] = 0
+            self._sum[:] = 0
+            self._hist[:] = 0
+
+    def _snapshot(self):
+        with self._lock:
+            return self._places.copy(), self._count.copy(), self._sum.copy(), self._hist.copy()
+
+    def _grouped(self, keys):
+        places, count, total, hist = self._snapshot()
+        frame = places.assign(count=count, sum=total)
+        frame[self.bin_labels()] = hist
+        frame = frame[frame["count"] > 0].groupby(keys, as_index=False, sort=True).sum(numeric_only=True)
+        frame.insert(len(keys) + 2, "mean", frame["sum"] / frame["count"])
+        return frame
+
+    def bin_labels(self):
+        return [f"{low:g}-{high:g}" for low, high in zip(self.edges[:-1], self.edges[1:])]
+
+    def county_table(self):
+        """County, State, count, sum, mean and one histogram column per bin, for every county with scores."""
+        return self._grouped(["County", "State"])
+
+    def state_table(self):
+        """State, State_Abbr, count, sum, mean and one histogram column per bin, for every state with scores."""
+        table = self._grouped(["State"])
+        table.insert(1, "State_Abbr", table["State"].map(STATE_ABBREVIATIONS))
+        return table
@@ -80,13 +80,22 @@
 
 # sentry_lite/risk_model.py
 
+import json
+import math
+import os
+
 import joblib
+import numpy as np
 import pandas as pd
 import xgboost as xgb
-from sklearn.model_selection import train_test_split, GridSearchCV
-from sklearn.preprocessing import LabelEncoder, StandardScaler
+from joblib import Parallel, delayed
+from sklearn.model_selection import train_test_split, GridSearchCV, ParameterSampler
 from sklearn.metrics import mean_squared_error
 
+from sentry_lite.model_store import native_path, save_native
+from sentry_lite.pipeline import PIPELINE_PATH, FeaturePipeline
+from sentry_lite.tracing import count, stage, timed
+
 def create_interaction_features(df):
     """
     Create interaction features that might capture higher-risk behavior patterns.
@@ -95,7 +104,126 @@ def create_interaction_features(df):
     df['High_Risk_Indicators'] = (df['Past_Denials'] > 0) & (df['Criminal_History'] > 0)
     return df
 
-def train_model(df):
+# Search space shared by the grid and successive-halving searches.
+PARAM_GRID = {
+    'max_depth': [3, 5, 7],
+    'learning_rate': [0.01, 0.1, 0.2],
+    'n_estimators': [100, 200, 300],
+    'subsample': [0.8, 0.9, 1.0],
+    'colsample_bytree': [0.8, 1.0]
+}
+
+SEARCH_CHECKPOINT_PATH = "models/search_checkpoint.jsonl"
+EARLY_STOPPING_ROUNDS = 20
+
+def thread_budget(n_parallel_fits):
+    """
+    Split the machine's cores between parallel fits and XGBoost's own threads
+    so that (parallel fits) x (threads per fit) never exceeds the core count.
+    """
+    cores = os.cpu_count() or 1
+    if n_parallel_fits is None or n_parallel_fits < 1:
+        n_parallel_fits = cores
+    n_parallel_fits = min(n_parallel_fits, cores)
+    return n_parallel_fits, max(1, cores // n_parallel_fits)
+
+def _trial_key(data_signature, round_index, params):
+    return data_signature, round_index, json.dumps(params, sort_keys=True)
+
+def _load_checkpoint(checkpoint_path):
+    """Read finished trials as {(data signature, round, params): trial}."""
+    trials = {}
+    if checkpoint_path and os.path.exists(checkpoint_path):
+        with open(checkpoint_path) as f:
+            for line in f:
+                try:
+                    trial = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # a partially written last line from an interrupted run
+                trials[_trial_key(trial["data_signature"], trial["round"], trial["params"])] = trial
+    return trials
+
+def _append_checkpoint(checkpoint_path, trial):
+    if checkpoint_path:
+        with open(checkpoint_path, "a") as f:
+            f.write(json.dumps(trial) + "\n")
+
+def _fit_trial(params, X_fit, y_fit, X_val, y_val, n_threads):
+    """Fit one candidate with early stopping on the validation split; return (mse, best_iteration)."""
+    model = xgb.XGBRegressor(
+        objective='reg:squarederror', random_state=42, n_jobs=n_threads,
+        early_stopping_rounds=EARLY_STOPPING_ROUNDS, **params
+    )
+    model.fit(X_fit, y_fit, eval_set=[(X_val, y_val)], verbose=False)
+    return float(mean_squared_error(y_val, model.predict(X_val))), int(model.best_iteration)
+
+def _keyed_trial(key, params, *args):
+    """_fit_trial tagged with its checkpoint key, for results that arrive out of order."""
+    return key, _fit_trial(params, *args)
+
+def halving_search(X_train, y_train, n_candidates=27, factor=3, checkpoint_path=SEARCH_CHECKPOINT_PATH, n_jobs=-1):
+    """
+    Successive-halving random search over PARAM_GRID.
+    Each round fits the surviving candidates on factor-times more samples and keeps
+    the best 1/factor; n_estimators is an upper bound cut short by early stopping.
+    Every finished trial is appended to checkpoint_path, and a rerun with the same
+    data skips trials already recorded there, so an interrupted search resumes.
+    Returns (best_params, n_estimators) for the final refit.
+    """
+    X_fit, X_val, y_fit, y_val = train_test_split(X_train, y_train, test_size=0.2, random_state=42)
+    y_fit, y_val = np.asarray(y_fit), np.asarray(y_val)
+    n_total = len(X_fit)
+
+    space = dict(PARAM_GRID, n_estimators=[max(PARAM_GRID['n_estimators'])])
+    candidates = list(ParameterSampler(space, n_iter=n_candidates, random_state=42))
+    n_rounds = max(1, math.ceil(math.log(len(candidates), factor)) + 1)
+    min_resources = max(1, n_total // factor ** (n_rounds - 1))
+
+    # Trials recorded for different training data are not reused.
+    data_signature = f"{X_fit.shape[0]}x{X_fit.shape[1]}:{float(np.sum(X_fit)):.6g}:{float(y_fit.sum()):.6g}"
+    finished = _load_checkpoint(checkpoint_path)
+    order = np.random.RandomState(42).permutation(n_total)
+    round_index = 0
+    while True:
+        n_samples = min(n_total, min_resources * factor ** round_index)
+        rows = order[:n_samples]
+        keys = [_trial_key(data_signature, round_index, params) for params in candidates]
+        pending = {key: params for params, key in zip(candidates, keys) if key not in finished}
+
+        if pending:
+            n_parallel, n_threads = thread_budget(min(len(pending), n_jobs) if n_jobs > 0 else len(pending))
+            results = Parallel(n_jobs=n_parallel, return_as="generator_unordered")(
+                delayed(_keyed_trial)(key, params, X_fit[rows], y_fit[rows], X_val, y_val, n_threads)
+                for key, params in pending.items()
+            )
+            # Results stream back as fits finish, so each one is checkpointed immediately.
+            for key, (mse, best_iteration) in results:
+                trial = {"data_signature": data_signature, "round": round_index, "n_samples": int(n_samples),
+                         "params": pending[key], "mse": mse, "best_iteration": best_iteration}
+                finished[key] = trial
+                _append_checkpoint(checkpoint_path, trial)
+
+        trials = sorted((finished[key] for key in keys), key=lambda trial: trial["mse"])
+        if len(trials) == 1 or round_index >= n_rounds - 1:
+            best = trials[0]
+            print(f"Halving search best validation MSE: {best['mse']} with {best['params']}")
+            return dict(best["params"]), best["best_iteration"] + 1
+
+        candidates = [trial["params"] for trial in trials[:max(1, math.ceil(len(trials) / factor))]]
+        round_index += 1
+
+# The columns that are categorical and need label encoding
+LABEL_COLUMNS = [
+    'Age', 'Gender', 'Country_of_Origin', 'Family_Ties_Status', 'Financial_Status', 
+    'Criminal_History', 'Known_Trafficking_Route', 'Past_Human_Trafficking_Case',
+    'Multiple_ICE_Investigations', 'Trafficking_Network_Affiliation', 'Illegal_Border_Crossing_Record',
+    'Duplicate_Records', 'Trafficking_Hotspot_Residence', 'Financial_Transactions_Flagged',
+    'Multiple_Unrelated_UACs', 'Background_Check_Status', 'Identity_Document_Verification',
+    'Unusual_Sponsor_UAC_Relationship', 'High_Risk_Indicators'
+]
+
+def split_features(df):
+    """Return (X, y): the raw model features with string column names, and the SAR target."""
     # Create new features
     df = create_interaction_features(df)
 
@@ -104,51 +232,49 @@ def train_model(df):
 
     # Ensure feature names are strings
     X.columns = [str(col) for col in X.columns]
+    return X, df["SAR"]
 
-    # Define the columns that are categorical and need label encoding
-    label_columns = [
-        'Age', 'Gender', 'Country_of_Origin', 'Family_Ties_Status', 'Financial_Status', 
-        'Criminal_History', 'Known_Trafficking_Route', 'Past_Human_Trafficking_Case',
-        'Multiple_ICE_Investigations', 'Trafficking_Network_Affiliation', 'Illegal_Border_Crossing_Record',
-        'Duplicate_Records', 'Trafficking_Hotspot_Residence', 'Financial_Transactions_Flagged',
-        'Multiple_Unrelated_UACs', 'Background_Check_Status', 'Identity_Document_Verification',
-        'Unusual_Sponsor_UAC_Relationship', 'High_Risk_Indicators'
-    ]
-    
-    label_encoder = LabelEncoder()
-    for col in label_columns:
-        X[col] = label_encoder.fit_transform(X[col])
-
-    # Scale features (especially important when mixing numeric and encoded features)
-    scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(X)
+def train_model(df, search="grid", checkpoint_path=SEARCH_CHECKPOINT_PATH, n_jobs=-1):
+    """
+    Train and save the SAR model.
+    search="grid" runs the exhaustive GridSearchCV over PARAM_GRID; search="halving"
+    runs the early-stopped, checkpointed halving_search instead.
+    """
+    X, y = split_features(df)
 
-    # Target variable
-    y = df["SAR"]
+    # Fit one label encoder per column plus the scaler (especially important when
+    # mixing numeric and encoded features), and keep them for inference.
+    pipeline = FeaturePipeline(LABEL_COLUMNS).fit(X)
+    X_scaled = pipeline.transform(X)
 
     # Split the data into training and testing sets
     X_train, X_test, y_train, y_test = train_test_split(X_scaled, y, test_size=0.2, random_state=42)
 
-    # Initialize the XGBoost regressor model
-    model = xgb.XGBRegressor(objective='reg:squarederror', random_state=42)
-
-    # Hyperparameter tuning using GridSearchCV
-    param_grid = {
-        'max_depth': [3, 5, 7],
-        'learning_rate': [0.01, 0.1, 0.2],
-        'n_estimators': [100, 200, 300],
-        'subsample': [0.8, 0.9, 1.0],
-        'colsample_bytree': [0.8, 1.0]
-    }
-    
-    grid_search = GridSearchCV(model, param_grid, cv=3, scoring='neg_mean_squared_error', n_jobs=-1)
-    grid_search.fit(X_train, y_train)
+    if search == "halving":
+        best_params, n_estimators = halving_search(X_train, y_train, checkpoint_path=checkpoint_path, n_jobs=n_jobs)
+        best_params['n_estimators'] = n_estimators
+        model = xgb.XGBRegressor(objective='reg:squarederror', random_state=42, **best_params)
+        model.fit(X_train, y_train)
+    else:
+        # Give each parallel fit its share of the cores instead of letting every fit use all of them
+        n_parallel, n_threads = thread_budget(n_jobs)
 
-    # Get the best model from the grid search
-    model = grid_search.best_estimator_
+        # Initialize the XGBoost regressor model
+        model = xgb.XGBRegressor(objective='reg:squarederror', random_state=42, n_jobs=n_threads)
 
-    # Save the model to disk using joblib
+        # Hyperparameter tuning using GridSearchCV
+        grid_search = GridSearchCV(model, PARAM_GRID, cv=3, scoring='neg_mean_squared_error', n_jobs=n_parallel)
+        grid_search.fit(X_train, y_train)
+
+        # Get the best model from the grid search, restoring full threading for inference
+        model = grid_search.best_estimator_
+        model.set_params(n_jobs=None)
+
+    # Save the model and the fitted preprocessing pipeline to disk using joblib
     joblib.dump(model, "models/sar_model.pkl")
+    joblib.dump(pipeline, PIPELINE_PATH)
+    # Native UBJSON copy for fast loading and inplace_predict scoring
+    save_native(model, native_path("models/sar_model.pkl"))
 
     # Evaluate the model using Mean Squared Error
     y_pred = model.predict(X_test)
@@ -157,6 +283,51 @@ def train_model(df):
 
     return model
 
+DRIFT_THRESHOLD = 0.5
+
+def feature_drift(pipeline, X):
+    """
+    Compare new raw features against the training distribution stored in the pipeline.
+    Returns {column: standardized mean shift} for columns that moved more than
+    DRIFT_THRESHOLD training standard deviations.
+    """
+    shift = np.abs(pipeline.encode(X).mean(axis=0) - pipeline.mean_) / pipeline.scale_
+    return {col: float(value) for col, value in zip(pipeline.columns, shift) if value > DRIFT_THRESHOLD}
+
+def update_model(df, model_path="models/sar_model.pkl", pipeline_path=PIPELINE_PATH, n_rounds=50, tolerance=0.0):
+    """
+    Continue boosting the saved model on newly arrived records instead of retraining.
+    The new records are encoded with the saved pipeline and split 80/20; n_rounds
+    trees are added to the existing booster (XGBoost xgb_model continuation) on the
+    80%, and the updated model is saved only if its MSE on the 20% is no more than
+    (1 + tolerance) times the old model's. Returns (model, accepted).
+    """
+    if not os.path.exists(pipeline_path):
+        raise FileNotFoundError(f"{pipeline_path} not found; run a full train_model first")
+    model = joblib.load(model_path)
+    pipeline = joblib.load(pipeline_path)
+
+    X, y = split_features(df)
+    drift = feature_drift(pipeline, X)
+    if drift:
+        print(f"Feature drift beyond {DRIFT_THRESHOLD} training SDs: {drift}")
+
+    X_fit, X_val, y_fit, y_val = train_test_split(pipeline.transform(X), y, test_size=0.2, random_state=42)
+    old_mse = mean_squared_error(y_val, model.predict(X_val))
+
+    updated = xgb.XGBRegressor(**dict(model.get_params(), n_estimators=n_rounds))
+    updated.fit(X_fit, y_fit, xgb_model=model.get_booster())
+    new_mse = mean_squared_error(y_val, updated.predict(X_val))
+    print(f"Validation MSE: current model {old_mse}, updated model {new_mse}")
+
+    if new_mse > old_mse * (1 + tolerance):
+        print("Updated model is worse on the new records; keeping the current model")
+        return model, False
+
+    joblib.dump(updated, model_path)
+    save_native(updated, native_path(model_path))
+    return updated, True
+
 def preprocess_user_input(user_input):
     """
     Preprocess user inputs into a format compatible with the trained model.
@@ -189,37 +360,115 @@ def preprocess_user_input(user_input):
     
     return user_input
 
-def predict_risk(record, model):
-    processed_input = preprocess_user_input(record)
+def preprocess_batch(records):
+    """
+    Vectorized counterpart of preprocess_user_input for many records at once.
+    Accepts a DataFrame or a list of record dicts and applies the same mappings
+    column-wise. Returns a new DataFrame; the input is left untouched.
+    """
+    df = records.copy() if isinstance(records, pd.DataFrame) else pd.DataFrame(list(records))
+    df.columns = [str(col) for col in df.columns]
+
+    def column(name, default):
+        # Missing columns and missing cells both fall back to the scalar default.
+        if name not in df.columns:
+            return pd.Series(default, index=df.index, dtype=object)
+        return df[name].where(df[name].notna(), default)
+
+    family_ties_map = {"Verified": 1, "Unverified": 0, "Unknown": 0}
+    df["Family_Ties_Status"] = column("Family_Ties_Status", "Unknown").map(family_ties_map).fillna(0)
+
+    df["Gender"] = (column("Gender", "F") == "M").astype(np.int8)
+
+    country_map = {"Honduras": 0, "Guatemala": 1, "El Salvador": 2, "Mexico": 3}
+    df["Country_of_Origin"] = column("Country_of_Origin", "Guatemala").map(country_map).fillna(-1)
+
+    financial_status_map = {"Low": 0, "Medium": 1, "High": 2}
+    df["Financial_Status"] = column("Financial_Status", "Low").map(financial_status_map).fillna(0)
+
+    for col in ["Criminal_History", "Prior_Trafficking_History", "Network_Affiliation", "Known_Trafficking_Route"]:
+        df[col] = column(col, False).astype(bool).astype(np.int8)
+
+    for col in ["Past_Sponsorships", "Past_Denials"]:
+        df[col] = column(col, 0).astype(np.int64)
 
-    # Convert the processed input into a DataFrame with string-based columns
-    record_df = pd.DataFrame([processed_input])
-    record_df.columns = [str(col) for col in record_df.columns]
+    return df
 
-    # Attempt to retrieve the model's expected feature names.
+# Fallback: the full list of features used during training, in model order.
+MODEL_FEATURES = [
+    'Age', 'Gender', 'Country_of_Origin', 'Family_Ties_Status', 'Prior_Trafficking_History',
+    'Past_Sponsorships', 'Past_Denials', 'Financial_Status', 'Criminal_History', 'Known_Trafficking_Route',
+    'Past_Human_Trafficking_Case', 'Multiple_ICE_Investigations', 'Trafficking_Network_Affiliation',
+    'Illegal_Border_Crossing_Record', 'Duplicate_Records', 'Trafficking_Hotspot_Residence',
+    'Financial_Transactions_Flagged', 'Multiple_Unrelated_UACs', 'Background_Check_Status',
+    'Identity_Document_Verification', 'Unusual_Sponsor_UAC_Relationship', 'High_Risk_Indicators'
+]
+
+def get_model_columns(model):
+    """Return the model's expected feature names, or MODEL_FEATURES if it has none."""
     try:
         model_columns = model.get_booster().feature_names
         if model_columns is None:
             raise AttributeError("Feature names not available in the model")
     except AttributeError:
-        # Fallback: Define the full list of features used during training
-        model_columns = [
-            'Age', 'Gender', 'Country_of_Origin', 'Family_Ties_Status', 'Prior_Trafficking_History',
-            'Past_Sponsorships', 'Past_Denials', 'Financial_Status', 'Criminal_History', 'Known_Trafficking_Route',
-            'Past_Human_Trafficking_Case', 'Multiple_ICE_Investigations', 'Trafficking_Network_Affiliation',
-            'Illegal_Border_Crossing_Record', 'Duplicate_Records', 'Trafficking_Hotspot_Residence',
-            'Financial_Transactions_Flagged', 'Multiple_Unrelated_UACs', 'Background_Check_Status',
-            'Identity_Document_Verification', 'Unusual_Sponsor_UAC_Relationship', 'High_Risk_Indicators'
-        ]
-
-    # Ensure all the expected columns are in the DataFrame, adding any missing columns with default value 0.
-    for col in model_columns:
-        if col not in record_df.columns:
-            record_df[col] = 0
-
-    # Reorder the columns in the same order as expected by the model.
-    record_df = record_df[model_columns]
+        model_columns = MODEL_FEATURES
+    return list(model_columns)
+
+def predict_risk(record, model, pipeline=None):
+    # A fitted pipeline saved by train_model encodes and scales exactly as in training.
+    if pipeline is not None:
+        with stage("preprocess"):
+            X = pipeline.transform(record)
+        with stage("predict"):
+            return model.predict(X)[0]
+
+    with stage("preprocess"):
+        processed_input = preprocess_user_input(record)
+
+        # Convert the processed input into a DataFrame with string-based columns
+        record_df = pd.DataFrame([processed_input])
+        record_df.columns = [str(col) for col in record_df.columns]
+
+        # Attempt to retrieve the model's expected feature names.
+        model_columns = get_model_columns(model)
+
+        # Ensure all the expected columns are in the DataFrame, adding any missing columns with default value 0.
+        for col in model_columns:
+            if col not in record_df.columns:
+                record_df[col] = 0
+
+        # Reorder the columns in the same order as expected by the model.
+        record_df = record_df[model_columns]
 
     # Predict the SAR score using the model.
-    prediction = model.predict(record_df)[0]
+    with stage("predict"):
+        prediction = model.predict(record_df)[0]
     return prediction
+
+@timed("preprocess")
+def feature_matrix(records, model, pipeline=None):
+    """Preprocess a DataFrame or list of records into the float32 matrix the model scores."""
+    if pipeline is not None:
+        return pipeline.transform(records)
+
+    df = preprocess_batch(records)
+    model_columns = get_model_columns(model)
+
+    # Assemble one contiguous float32 matrix; features the records lack stay 0.
+    X = np.zeros((len(df), len(model_columns)), dtype=np.float32)
+    for j, col in enumerate(model_columns):
+        if col in df.columns:
+            X[:, j] = pd.to_numeric(df[col], errors="coerce").fillna(0).to_numpy(dtype=np.float32)
+    return X
+
+def predict_risk_batch(records, model, pipeline=None):
+    """
+    Score a DataFrame or list of records with a single model.predict call.
+    Returns a NumPy array of SAR scores in input row order.
+    """
+    X = feature_matrix(records, model, pipeline)
+    if len(X) == 0:
+        return np.empty(0, dtype=np.float32)
+    count("rows_scored", len(X))
+    with stage("predict_batch"):
+        return model.predict(X)
@@ -0,0 +1,184 @@
+# sentry_lite/score_cache.py
+
+import contextlib
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+
+from sentry_lite.risk_model import feature_matrix
+from sentry_lite.tracing import count, stage
+
+SCORE_CACHE_ENV = "SENTRY_SCORE_CACHE"
+
+_model_versions = weakref.WeakKeyDictionary()
+
+
+def model_version(model):
+    """Short content hash of a model's booster, computed once per model object."""
+    version = _model_versions.get(model)
+    if version is None:
+        raw = model.get_booster().save_raw(raw_format="ubj")
+        version = _model_versions[model] = hashlib.blake2b(bytes(raw), digest_size=8).hexdigest()
+    return version
+
+
+def feature_key(features, version):
+    """Canonical key for one preprocessed feature vector scored by one model version."""
+    row = np.ascontiguousarray(features, dtype=np.float32).ravel()
+    return version + ":" + hashlib.blake2b(row.tobytes(), digest_size=16).hexdigest()
+
+
+class ScoreCache:
+    """
+    Bounded memo of SAR scores keyed by feature_key.
+
+    The in-memory tier is an LRU OrderedDict of at most maxsize entries; with a
+    ttl (seconds) entries older than that are treated as misses. disk_path
+    (default: $SENTRY_SCORE_CACHE) adds an SQLite tier that any number of
+    processes on the host can share; in-memory misses fall through to it.
+    Every prune_every disk writes (starting with the first), the disk tier
+    drops expired rows, then its oldest rows beyond disk_maxrows. Keys embed
+    the model version, so processes scoring with different models (e.g. during
+    a rolling deploy) share the file without seeing or evicting each other's
+    scores; rows of retired versions age out by TTL and the row cap.
+    predict_risk also remembers which key each raw record preprocessed to, so
+    repeat scoring of an unchanged record skips preprocessing as well.
+    """
+
+    def __init__(self, maxsize=4096, ttl=None, disk_path=None, disk_maxrows=100_000, prune_every=256):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.disk_path = disk_path or os.environ.get(SCORE_CACHE_ENV)
+        self.disk_maxrows = disk_maxrows
+        self.prune_every = prune_every
+        self._disk_writes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._aliases = OrderedDict()
+        self._alias_owner = None
+        self._lock = threading.Lock()
+        if self.disk_path:
+            self._execute("CREATE TABLE IF NOT EXISTS scores (key TEXT PRIMARY KEY, score REAL, created REAL)")
+            self._execute("CREATE INDEX IF NOT EXISTS scores_created ON scores (created)")
+
+    def _execute(self, sql, params=()):
+        # A short-lived connection per call keeps the disk tier usable from any thread or process.
+        with contextlib.closing(sqlite3.connect(self.disk_path, timeout=5)) as db, db:
+            return db.execute(sql, params).fetchone()
+
+    def prune(self):
+        """Delete expired disk rows, then the oldest rows beyond disk_maxrows."""
+        with contextlib.closing(sqlite3.connect(self.disk_path, timeout=5)) as db, db:
+            if self.ttl is not None:
+                db.execute("DELETE FROM scores WHERE created < ?", (time.time() - self.ttl,))
+            db.execute(
+                "DELETE FROM scores WHERE key IN (SELECT key FROM scores ORDER BY created DESC LIMIT -1 OFFSET ?)",
+                (self.disk_maxrows,),
+            )
+
+    def _expired(self, created):
+        return self.ttl is not None and time.time() - created > self.ttl
+
+    def get(self, key):
+        """Cached score for key, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and not self._expired(entry[1]):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                count("score_cache_hit")
+                return entry[0]
+        if self.disk_path:
+            row = self._execute("SELECT score, created FROM scores WHERE key = ?", (key,))
+            if row is not None and not self._expired(row[1]):
+                self._remember(key, row[0], row[1])
+                with self._lock:
+                    self.disk_hits += 1
+                count("score_cache_disk_hit")
+                return row[0]
+        with self._lock:
+            self.misses += 1
+        count("score_cache_miss")
+        return None
+
+    def _remember(self, key, score, created):
+        with self._lock:
+            self._entries[key] = (score, created)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def put(self, key, score):
+        created = time.time()
+        self._remember(key, score, created)
+        if self.disk_path:
+            self._execute("INSERT OR REPLACE INTO scores VALUES (?, ?, ?)", (key, score, created))
+            with self._lock:
+                due = self._disk_writes % self.prune_every == 0
+                self._disk_writes += 1
+            if due:
+                self.prune()
+
+    def _feature_key_for(self, record, model, pipeline):
+        """Return (key, features) for a record; features is None when the key came from the alias map."""
+        version = model_version(model)
+        try:
+            alias = tuple(sorted(record.items()))
+            hash(alias)
+        except TypeError:
+            alias = None
+        with self._lock:
+            # Aliases are only valid for the model and pipeline that produced them.
+            if self._alias_owner is None or self._alias_owner[0] != version or self._alias_owner[1] is not pipeline:
+                self._aliases.clear()
+                self._alias_owner = (version, pipeline)
+            key = self._aliases.get(alias) if alias is not None else None
+            if key is not None:
+                self._aliases.move_to_end(alias)
+                return key, None
+
+        # The pipeline has a single-record fast path for dicts; the fallback path takes a list.
+        features = feature_matrix(record if pipeline is not None else [record], model, pipeline)
+        key = feature_key(features, version)
+        if alias is not None:
+            with self._lock:
+                self._aliases[alias] = key
+                while len(self._aliases) > self.maxsize:
+                    self._aliases.popitem(last=False)
+        return key, features
+
+    def predict_risk(self, record, model, pipeline=None):
+        """predict_risk through the cache: preprocess and score only on a miss."""
+        key, features = self._feature_key_for(record, model, pipeline)
+        score = self.get(key)
+        if score is None:
+            if features is None:
+                features = feature_matrix(record if pipeline is not None else [record], model, pipeline)
+            with stage("predict"):
+                score = float(model.predict(features)[0])
+            self.put(key, score)
+        return score
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._aliases.clear()
@@ -0,0 +1,123 @@
+# sentry_lite/score_file.py
+"""
+Score a large sponsor extract chunk by chunk with bounded memory.
+
+    python -m sentry_lite.score_file sponsors.csv scored.csv
+    python -m sentry_lite.score_file sponsors.parquet scored.parquet --chunk-size 200000 --columns Sponsor_ID
+
+Input may be CSV, Parquet or Arrow IPC (an Excel workbook is read through its
+.arrow copy written by sentry_lite.ingest). Output is CSV or Parquet, chosen by
+the output file's extension, and is written as each chunk is scored.
+"""
+
+import argparse
+import os
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from sentry_lite.datastore import arrow_schema, iter_chunks, normalize_dtypes
+from sentry_lite.pipeline import PIPELINE_PATH
+from sentry_lite.resources import load_model
+from sentry_lite.risk_model import get_model_columns, predict_risk_batch
+
+SCORE_COLUMN = "SAR_Score"
+
+
+class ChunkWriter:
+    """
+    Append scored chunks to a CSV or Parquet file; the first chunk fixes the
+    header/schema. Columns that are entirely null in the first chunk carry no
+    type, so they are written as strings, and every chunk is cast to the schema.
+    """
+
+    def __init__(self, path):
+        if not path.endswith((".csv", ".parquet")):
+            raise ValueError(f"Unsupported output format: {path} (use .csv or .parquet)")
+        self.path = path
+        self.schema = None
+        self._parquet = None
+        self._rows = 0
+
+    def write(self, df):
+        first = self._rows == 0
+        self._rows += len(df)
+        if self.path.endswith(".csv"):
+            df.to_csv(self.path, mode="w" if first else "a", header=first, index=False)
+            return
+        df = normalize_dtypes(df)
+        if self._parquet is None:
+            self.schema = arrow_schema(df)
+            for col in df.columns[df.isna().all().to_numpy()]:
+                self.schema = self.schema.set(self.schema.get_field_index(col), pa.field(col, pa.string()))
+            self._parquet = pq.ParquetWriter(self.path, self.schema)
+        self._parquet.write_table(pa.Table.from_pandas(self._conform(df), schema=self.schema, preserve_index=False))
+
+    def _conform(self, df):
+        """Turn the values of string columns in the schema into strings, whatever dtype this chunk read them as."""
+        df = df.copy()
+        for field in self.schema:
+            is_string = pa.types.is_string(field.type) or pa.types.is_large_string(field.type)
+            if is_string and df[field.name].dtype != object and not pd.api.types.is_string_dtype(df[field.name]):
+                df[field.name] = df[field.name].astype("string")
+        return df
+
+    def close(self):
+        if self._parquet is not None:
+            self._parquet.close()
+
+
+def csv_dtypes(path, model, pipeline=None):
+    """
+    read_csv dtypes for a CSV extract: every column outside the feature contract
+    (the model's features and the pipeline's training columns) is read as a
+    string, so pass-through columns keep one type across chunks.
+    """
+    features = set(get_model_columns(model)) | set(getattr(pipeline, "columns", None) or [])
+    header = pd.read_csv(path, nrows=0).columns
+    return {col: "string" for col in header if str(col) not in features}
+
+
+def score_file(input_path, output_path, model, pipeline=None, chunk_size=100_000, columns=None):
+    """
+    Stream input_path through predict_risk_batch and write each scored chunk to
+    output_path. Keeps the given input columns (all of them by default) plus
+    SAR_Score. Returns the number of rows scored.
+    """
+    dtype = csv_dtypes(input_path, model, pipeline) if input_path.endswith(".csv") else None
+    writer = ChunkWriter(output_path)
+    rows = 0
+    try:
+        for chunk in iter_chunks(input_path, chunk_size, dtype):
+            scores = predict_risk_batch(chunk, model, pipeline)
+            out = chunk[columns].copy() if columns else chunk
+            out[SCORE_COLUMN] = scores
+            writer.write(out)
+            rows += len(chunk)
+    finally:
+        writer.close()
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a sponsor extract in fixed-size chunks.")
+    parser.add_argument("input", help="CSV, Parquet or Arrow IPC file")
+    parser.add_argument("output", help="Destination .csv or .parquet")
+    parser.add_argument("--model", default="models/sar_model.pkl")
+    parser.add_argument("--pipeline", default=PIPELINE_PATH)
+    parser.add_argument("--chunk-size", type=int, default=100_000, help="Rows per chunk (default: 100000)")
+    parser.add_argument("--columns", nargs="+", help="Input columns to carry into the output (default: all)")
+    args = parser.parse_args(argv)
+
+    model = load_model(args.model)
+    pipeline = load_model(args.pipeline) if args.pipeline and os.path.exists(args.pipeline) else None
+
+    start = time.perf_counter()
+    rows = score_file(args.input, args.output, model, pipeline, args.chunk_size, args.columns)
+    print(f"Scored {rows} rows into {args.output} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+# sentry_lite/scoring.py
+"""
+Post-model duplication (D) score adjustments as versioned, declarative rule sets.
+
+A rule set is an ordered tuple of {"when": condition, "then": action} rules
+applied to a running score, exactly like the original if/else chain:
+
+    conditions  ("ne", field, value)  ("gt", field, value)  ("between", field, low, high)
+                ("true", field)  ("any", cond, ...)  ("all", cond, ...)
+    actions     ("add", field, weight)   score += field * weight
+                ("mul", factor)          score *= factor
+                ("set", value)           score = value
+                ("return", value)        score = value and later rules are skipped
+
+The result is truncated to an integer and capped at 100. compile_rules turns a
+rule set into one function of NumPy arrays built from np.where, so a whole
+batch of sponsors is scored without a Python loop.
+"""
+
+import numpy as np
+
+from sentry_lite.tracing import timed
+
+D_SCORE_ARGS = ["score", "sponsor_age", "past_sponsorships", "past_denials",
+                "criminal_history", "known_route", "network_affiliation", "prior_trafficking"]
+
+_TRAFFICKING_OVERRIDES = (
+    {"when": ("all", ("true", "known_route"), ("true", "network_affiliation"), ("true", "prior_trafficking")),
+     "then": ("return", 98)},
+    {"when": ("true", "known_route"), "then": ("set", 87)},
+    {"when": ("true", "network_affiliation"), "then": ("set", 89)},
+    {"when": ("true", "prior_trafficking"), "then": ("set", 92)},
+)
+
+_AGE_AND_CRIMINAL_HISTORY = (
+    {"when": ("any", ("between", "sponsor_age", 18, 28), ("gt", "sponsor_age", 75)), "then": ("mul", 1.2)},
+    {"when": ("true", "criminal_history"), "then": ("mul", 1.5)},
+)
+
+D_SCORE_RULES = {
+    # Weights originally used by main_v1.py: additive denials.
+    "v1": (
+        {"when": ("ne", "past_sponsorships", 0), "then": ("add", "past_sponsorships", 7)},
+        {"when": ("ne", "past_denials", 0), "then": ("add", "past_denials", 10)},
+    ) + _AGE_AND_CRIMINAL_HISTORY + _TRAFFICKING_OVERRIDES,
+    # Weights used by main.py and the scoring service: any prior denial sets the score to 87.
+    "v2": (
+        {"when": ("ne", "past_sponsorships", 0), "then": ("add", "past_sponsorships", 5)},
+        {"when": ("ne", "past_denials", 0), "then": ("set", 87)},
+    ) + _AGE_AND_CRIMINAL_HISTORY + _TRAFFICKING_OVERRIDES,
+}
+D_SCORE_VERSION = "v2"
+
+
+def _condition(spec, columns):
+    op = spec[0]
+    if op == "any":
+        return np.logical_or.reduce([_condition(part, columns) for part in spec[1:]])
+    if op == "all":
+        return np.logical_and.reduce([_condition(part, columns) for part in spec[1:]])
+    values = columns[spec[1]]
+    if op == "true":
+        return values.astype(bool)
+    if op == "ne":
+        return values != spec[2]
+    if op == "gt":
+        return values > spec[2]
+    if op == "between":
+        return (values >= spec[2]) & (values <= spec[3])
+    raise ValueError(f"Unknown rule condition: {op!r}")
+
+
+def _action(spec, score, columns):
+    op = spec[0]
+    if op == "add":
+        return score + columns[spec[1]] * spec[2]
+    if op == "mul":
+        return score * spec[1]
+    if op in ("set", "return"):
+        return np.full_like(score, spec[1])
+    raise ValueError(f"Unknown rule action: {op!r}")
+
+
+def compile_rules(rules):
+    """
+    Compile a rule set into fn(columns) -> int64 array, where columns maps each
+    D_SCORE_ARGS name to an array (or scalar) of equal length.
+    """
+    rules = tuple(rules)
+
+    def apply(columns):
+        columns = {name: np.asarray(value) for name, value in columns.items()}
+        score = np.asarray(columns["score"], dtype=np.float64).copy()
+        done = np.zeros(score.shape, dtype=bool)
+        for rule in rules:
+            hit = _condition(rule["when"], columns) & ~done
+            score = np.where(hit, _action(rule["then"], score, columns), score)
+            if rule["then"][0] == "return":
+                done |= hit
+        return np.minimum(np.trunc(score), 100).astype(np.int64)
+
+    return apply
+
+
+_compiled = {version: compile_rules(rules) for version, rules in D_SCORE_RULES.items()}
+
+
+@timed("d_score")
+def calculate_d_score_batch(score, sponsor_age, past_sponsorships, past_denials,
+                            criminal_history, known_route, network_affiliation, prior_trafficking,
+                            version=D_SCORE_VERSION):
+    """Vectorized calculate_d_score: every argument may be an array; returns an int64 array."""
+    columns = {
+        "score": score, "sponsor_age": sponsor_age, "past_sponsorships": past_sponsorships,
+        "past_denials": past_denials, "criminal_history": criminal_history, "known_route": known_route,
+        "network_affiliation": network_affiliation, "prior_trafficking": prior_trafficking,
+    }
+    n_rows = max(np.size(value) for value in columns.values())
+    return _compiled[version]({name: np.broadcast_to(value, n_rows) for name, value in columns.items()})
+
+
+def calculate_d_score(score, sponsor_age, past_sponsorships, past_denials,
+                      criminal_history, known_route, network_affiliation, prior_trafficking,
+                      version=D_SCORE_VERSION):
+    """Calculate the duplication risk score based on provided factors."""
+    return int(calculate_d_score_batch(score, sponsor_age, past_sponsorships, past_denials, criminal_history,
+                                       known_route, network_affiliation, prior_trafficking, version)[0])
@@ -0,0 +1,202 @@
+# sentry_lite/serve.py
+"""
+Headless JSON scoring service.
+
+    python -m sentry_lite.serve --port 8080 --workers 8 [--sponsors sponsors.xlsx]
+
+Endpoints (all POST bodies and responses are JSON):
+    GET  /health
+    GET  /metrics          stage latencies, counters and batching stats (?format=prometheus for text)
+    POST /predict_risk     {"record": {...}} or {"records": [{...}, ...]}
+    POST /d_score          keyword arguments of calculate_d_score
+    POST /deduplicate      {"record": {"Sponsor_ID": "..."}}
+    POST /match            {"record": {"first_name": ..., "address": ..., "phone": ..., "email": ...}, "k": 10}
+
+With --profile-dir, adding ?profile=1 to a POST runs it under cProfile and
+returns the .prof path in the X-Profile header.
+"""
+
+import argparse
+import json
+import functools
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import tornado.httpserver
+import tornado.ioloop
+import tornado.netutil
+import tornado.process
+import tornado.web
+
+from sentry_lite.batching import MicroBatcher
+from sentry_lite.datastore import read_table
+from sentry_lite.deduplication import build_index
+from sentry_lite.identity_index import MIN_SIMILARITY, build_identity_index
+from sentry_lite.resources import load_model
+from sentry_lite.risk_model import predict_risk, predict_risk_batch
+from sentry_lite.scoring import D_SCORE_ARGS, calculate_d_score
+from sentry_lite.tracing import profile, tracer
+
+
+def checked_records(body):
+    """The list of records in a /predict_risk body; raises ValueError unless every one is a JSON object."""
+    records = body["records"] if "records" in body else [body["record"]]
+    if not isinstance(records, list) or not all(isinstance(record, dict) for record in records):
+        raise ValueError('"record" must be an object and "records" a list of objects')
+    return records
+
+
+class ScoringService:
+    """Model, pipeline and sponsor index loaded once at startup and shared by all handlers."""
+
+    def __init__(self, model_path, pipeline_path=None, sponsors_path=None, workers=None,
+                 max_batch_size=64, max_wait_ms=2.0, profile_dir=None):
+        self.profile_dir = profile_dir
+        self.model = load_model(model_path)
+        self.pipeline = load_model(pipeline_path) if pipeline_path and os.path.exists(pipeline_path) else None
+        sponsors = read_table(sponsors_path) if sponsors_path else None
+        self.sponsor_index = build_index(sponsors) if sponsors is not None and "Sponsor_ID" in sponsors.columns else None
+        self.identity_index = build_identity_index(sponsors) if sponsors is not None else None
+        # XGBoost and rapidfuzz release the GIL, so a thread pool runs requests in parallel.
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        # Concurrent single-record predictions are coalesced into one model call.
+        self.batcher = MicroBatcher(self.model, self.pipeline, max_batch_size, max_wait_ms) if max_batch_size > 1 else None
+
+    def predict(self, body):
+        records = checked_records(body)
+        if "records" in body:
+            scores = predict_risk_batch(records, self.model, self.pipeline)
+            return {"scores": [float(score) for score in scores]}
+        return {"score": float(predict_risk(records[0], self.model, self.pipeline))}
+
+    def d_score(self, body):
+        return {"d_score": calculate_d_score(**{name: body[name] for name in D_SCORE_ARGS})}
+
+    def deduplicate(self, body):
+        if self.sponsor_index is None:
+            raise tornado.web.HTTPError(503, reason="No sponsor table with a Sponsor_ID column loaded; start with --sponsors")
+        matches = self.sponsor_index.query(body["record"]["Sponsor_ID"])
+        return {"matches": [{"Sponsor_ID": sponsor_id, "score": score} for sponsor_id, score in matches]}
+
+    def match(self, body):
+        if self.identity_index is None:
+            raise tornado.web.HTTPError(503, reason="No sponsor table loaded; start with --sponsors")
+        matches = self.identity_index.query(body["record"], k=int(body.get("k", 10)),
+                                            min_similarity=float(body.get("min_similarity", MIN_SIMILARITY)))
+        return {"matches": [{"ID": sponsor_id, "similarity": similarity} for sponsor_id, similarity in matches]}
+
+
+class HealthHandler(tornado.web.RequestHandler):
+    def initialize(self, service):
+        self.service = service
+
+    def get(self):
+        self.write({"status": "ok", "deduplication": self.service.sponsor_index is not None,
+                    "identity_matching": self.service.identity_index is not None})
+
+
+class MetricsHandler(tornado.web.RequestHandler):
+    def initialize(self, service):
+        self.service = service
+
+    def get(self):
+        if self.get_query_argument("format", "json") == "prometheus":
+            self.set_header("Content-Type", "text/plain; version=0.0.4")
+            self.write(tracer.to_prometheus())
+            return
+        self.write(dict(tracer.snapshot(), batching=self.service.batcher.stats() if self.service.batcher else None))
+
+
+class ScoringHandler(tornado.web.RequestHandler):
+    """Decode the JSON body, run the scoring call on the worker pool and encode the result."""
+
+    def initialize(self, service, method):
+        self.service = service
+        self.method = method
+
+    def json_body(self):
+        try:
+            return json.loads(self.request.body)
+        except json.JSONDecodeError:
+            raise tornado.web.HTTPError(400, reason="Request body must be JSON")
+
+    def profiling(self):
+        return self.service.profile_dir is not None and self.get_query_argument("profile", "0") == "1"
+
+    def _profiled(self, call, body):
+        with profile(self.method, self.service.profile_dir) as path:
+            result = call(body)
+        self.set_header("X-Profile", path)
+        return result
+
+    async def run(self, body):
+        loop = tornado.ioloop.IOLoop.current()
+        call = getattr(self.service, self.method)
+        if self.profiling():
+            # Profile inside the worker thread, where the scoring work actually runs.
+            call = functools.partial(self._profiled, call)
+        return await loop.run_in_executor(self.service.executor, call, body)
+
+    async def post(self):
+        start = time.perf_counter()
+        body = self.json_body()
+        try:
+            result = await self.run(body)
+        except (KeyError, TypeError, ValueError) as e:
+            tracer.count(f"http_{self.method}_errors")
+            raise tornado.web.HTTPError(400, reason=f"Invalid request: {e}")
+        tracer.record(f"http_{self.method}", time.perf_counter() - start)
+        self.write(result)
+
+
+class PredictHandler(ScoringHandler):
+    """Single records go through the service's micro-batcher; explicit batches go straight to the pool."""
+
+    async def run(self, body):
+        if "record" in body and self.service.batcher is not None and not self.profiling():
+            record, = checked_records(body)
+            return {"score": await self.service.batcher.predict_async(record)}
+        return await super().run(body)
+
+
+def make_app(service):
+    return tornado.web.Application([
+        (r"/health", HealthHandler, {"service": service}),
+        (r"/metrics", MetricsHandler, {"service": service}),
+        (r"/predict_risk", PredictHandler, {"service": service, "method": "predict"}),
+        (r"/d_score", ScoringHandler, {"service": service, "method": "d_score"}),
+        (r"/deduplicate", ScoringHandler, {"service": service, "method": "deduplicate"}),
+        (r"/match", ScoringHandler, {"service": service, "method": "match"}),
+    ])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve sentry_lite scoring over HTTP.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--model", default="models/sar_model.pkl")
+    parser.add_argument("--pipeline", default="models/sar_pipeline.pkl")
+    parser.add_argument("--sponsors", help="Sponsor table (Excel/Arrow/Parquet/CSV) for /deduplicate and /match")
+    parser.add_argument("--workers", type=int, default=None, help="Scoring threads per process")
+    parser.add_argument("--max-batch-size", type=int, default=64, help="Most single-record requests scored in one model call (1 disables micro-batching)")
+    parser.add_argument("--max-wait-ms", type=float, default=2.0, help="How long a batch waits for more requests after the first arrives")
+    parser.add_argument("--profile-dir", help="Allow ?profile=1 requests and write their cProfile dumps here")
+    parser.add_argument("--processes", type=int, default=1, help="Server processes sharing the port (0 = one per core)")
+    args = parser.parse_args(argv)
+
+    # Bind before forking so every process accepts on the same socket; each then loads its own model.
+    sockets = tornado.netutil.bind_sockets(args.port, address=args.host)
+    if args.processes != 1:
+        tornado.process.fork_processes(args.processes)
+
+    service = ScoringService(args.model, args.pipeline, args.sponsors, args.workers,
+                             args.max_batch_size, args.max_wait_ms, args.profile_dir)
+    server = tornado.httpserver.HTTPServer(make_app(service))
+    server.add_sockets(sockets)
+    print(f"Serving on http://{args.host}:{args.port}")
+    tornado.ioloop.IOLoop.current().start()
+
+
+if __name__ == "__main__":
+    main()
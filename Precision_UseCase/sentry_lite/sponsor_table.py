@@ -0,0 +1,90 @@
+# sentry_lite/sponsor_table.py
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+# Identity fields shown on the Sponsor Information page.
+ORANGE_COLUMNS = ["ID", "first_name", "last_name", "dob", "email", "phone",
+                  "sponsor_id_hash", "fingerprint_hash", "ssn"]
+
+# System-check results and risk flags shown on the System Checks page.
+PURPLE_COLUMNS = ["is_duplicate", "county", "high_trafficking",
+                  "Sponsor Registration", "FBI Fingerprint (Galton)",
+                  "Orange-IAM", "Purple-Vetting", "UAC Portal", "ICE",
+                  "CBP", "ATIMS", "DHS Payment", "Local Welfare Services"]
+
+CATEGORY_COLUMNS = ["county", "first_name", "last_name"]
+HASH_COLUMNS = ["sponsor_id_hash", "fingerprint_hash"]
+FLAG_COLUMNS = [col for col in PURPLE_COLUMNS if col != "county"]
+
+HASH_BYTES = 32  # SHA-256 digests, stored as 64 hex characters in the workbooks
+
+
+def _hash_array(values):
+    """Hex digests as an Arrow fixed_size_binary(32) array, or None if any value is not one."""
+    digests = []
+    for value in values:
+        if value is None or (isinstance(value, float) and np.isnan(value)):
+            digests.append(None)
+            continue
+        try:
+            digest = bytes.fromhex(value)
+        except (TypeError, ValueError):
+            return None
+        if len(digest) != HASH_BYTES:
+            return None
+        digests.append(digest)
+    return pd.arrays.ArrowExtensionArray(pa.array(digests, type=pa.binary(HASH_BYTES)))
+
+
+def compact_sponsor_table(df):
+    """
+    Return the orange and purple columns of a sponsor workbook with compact dtypes:
+    categoricals for county and names, bool for the system-check flags,
+    fixed-width 32-byte binary for the hashes, Arrow strings for the other text
+    fields and the smallest integer type for ID. Other columns are dropped.
+    """
+    columns = {}
+    for col in ORANGE_COLUMNS + PURPLE_COLUMNS:
+        if col not in df.columns:
+            continue
+        values = df[col]
+        if col in CATEGORY_COLUMNS:
+            values = values.astype("category")
+        elif col in FLAG_COLUMNS:
+            values = values.where(values.notna(), False).astype(bool)
+        elif col in HASH_COLUMNS:
+            digests = _hash_array(values.to_numpy(dtype=object))
+            values = pd.Series(digests, index=df.index) if digests is not None else values.astype("string[pyarrow]")
+        elif col == "ID":
+            values = pd.to_numeric(values, downcast="integer")
+        else:
+            values = values.astype("string[pyarrow]")
+        columns[col] = values
+    return pd.DataFrame(columns, copy=False)
+
+
+def split_views(table):
+    """
+    Split a compact sponsor table into (orange_data, purple_data).
+    Both frames reference the table's column arrays instead of copying them.
+    """
+    def view(cols):
+        available = [col for col in cols if col in table.columns]
+        return pd.DataFrame({col: table[col] for col in available}, copy=False)
+
+    return view(ORANGE_COLUMNS), view(PURPLE_COLUMNS)
+
+
+def hash_hex(value):
+    """Hex string for a hash value from a compact table (bytes), passing anything else through."""
+    return value.hex() if isinstance(value, bytes) else value
+
+
+def display_frame(df):
+    """Copy of df with binary hash columns rendered as hex, for st.dataframe."""
+    binary = [col for col in HASH_COLUMNS if col in df.columns and isinstance(df[col].dtype, pd.ArrowDtype)]
+    if not binary:
+        return df
+    return df.assign(**{col: df[col].map(hash_hex, na_action="ignore").astype("string[pyarrow]") for col in binary})
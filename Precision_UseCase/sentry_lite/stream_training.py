@@ -0,0 +1,128 @@
+# sentry_lite/stream_training.py
+"""
+Train the SAR model on a population too large to load at once.
+
+    python -m sentry_lite.train_model --external shards/*.parquet
+
+Shards (Parquet, CSV or Arrow IPC) are read chunk by chunk. The preprocessing
+pipeline is fitted in two streaming passes (FeaturePipeline.fit_stream), then
+XGBoost pulls encoded chunks through a DataIter into an external-memory
+DMatrix paged to cache_dir, or into a QuantileDMatrix with mode="quantile".
+Only one chunk of raw data is decoded at a time, so peak memory is bounded by
+chunk_size rather than by the population size.
+"""
+
+import os
+
+import joblib
+import numpy as np
+import xgboost as xgb
+from sklearn.metrics import mean_squared_error
+
+from sentry_lite.datastore import iter_chunks
+from sentry_lite.model_store import native_path, save_native
+from sentry_lite.pipeline import PIPELINE_PATH, FeaturePipeline
+from sentry_lite.risk_model import LABEL_COLUMNS, split_features
+
+STREAM_PARAMS = {
+    "objective": "reg:squarederror",
+    "tree_method": "hist",
+    "max_depth": 5,
+    "learning_rate": 0.1,
+    "subsample": 0.9,
+    "colsample_bytree": 1.0,
+    "seed": 42,
+}
+
+
+def _chunks(paths, chunk_size):
+    for path in paths:
+        yield from iter_chunks(path, chunk_size)
+
+
+def _validation_mask(chunk_index, n_rows, fraction):
+    # Seeded per chunk, so every pass over the shards holds out the same rows.
+    return np.random.default_rng(chunk_index).random(n_rows) < fraction
+
+
+class ShardIter(xgb.DataIter):
+    """
+    Feed encoded training chunks to XGBoost one at a time.
+    Rows held out by _validation_mask are skipped here and collected separately.
+    """
+
+    def __init__(self, paths, pipeline, chunk_size, validation_fraction, cache_prefix=None):
+        self.paths = paths
+        self.pipeline = pipeline
+        self.chunk_size = chunk_size
+        self.validation_fraction = validation_fraction
+        self._chunks = None
+        self._index = 0
+        super().__init__(cache_prefix=cache_prefix)
+
+    def reset(self):
+        self._chunks = None
+        self._index = 0
+
+    def next(self, input_data):
+        if self._chunks is None:
+            self._chunks = _chunks(self.paths, self.chunk_size)
+        for df in self._chunks:
+            X, y = split_features(df)
+            train = ~_validation_mask(self._index, len(df), self.validation_fraction)
+            self._index += 1
+            if train.any():
+                input_data(data=self.pipeline.transform(X[train]), label=y.to_numpy()[train])
+                return 1
+        return 0
+
+
+def train_external(paths, mode="external", chunk_size=100_000, num_boost_round=300,
+                   validation_fraction=0.2, max_validation_rows=200_000, cache_dir="models/xgb_cache",
+                   params=None, model_path="models/sar_model.pkl", pipeline_path=PIPELINE_PATH):
+    """
+    Fit the pipeline and an XGBoost hist model on the shards at paths without
+    loading them whole, early-stopping on held-out rows (at most max_validation_rows
+    of them are kept in memory). Saves the model (pickle and .ubj) and the pipeline
+    where train_model does, and returns the fitted XGBRegressor.
+    """
+    paths = list(paths)
+    pipeline = FeaturePipeline(LABEL_COLUMNS).fit_stream(
+        lambda: (split_features(df)[0] for df in _chunks(paths, chunk_size))
+    )
+
+    X_val, y_val, n_val = [], [], 0
+    for i, df in enumerate(_chunks(paths, chunk_size)):
+        held_out = _validation_mask(i, len(df), validation_fraction)
+        if held_out.any() and n_val < max_validation_rows:
+            X, y = split_features(df[held_out].head(max_validation_rows - n_val).copy())
+            X_val.append(pipeline.transform(X))
+            y_val.append(y.to_numpy())
+            n_val += len(y)
+
+    if mode == "external":
+        os.makedirs(cache_dir, exist_ok=True)
+        it = ShardIter(paths, pipeline, chunk_size, validation_fraction, cache_prefix=os.path.join(cache_dir, "sar"))
+        dtrain = xgb.DMatrix(it)
+    elif mode == "quantile":
+        dtrain = xgb.QuantileDMatrix(ShardIter(paths, pipeline, chunk_size, validation_fraction))
+    else:
+        raise ValueError(f"Unknown mode: {mode!r} (use 'external' or 'quantile')")
+
+    evals, early_stopping = [], None
+    if n_val:
+        X_val, y_val = np.concatenate(X_val), np.concatenate(y_val)
+        evals, early_stopping = [(xgb.DMatrix(X_val, label=y_val), "validation")], 20
+    booster = xgb.train(dict(STREAM_PARAMS, **(params or {})), dtrain, num_boost_round=num_boost_round,
+                        evals=evals, early_stopping_rounds=early_stopping, verbose_eval=False)
+
+    # Same artifacts as train_model: an XGBRegressor pickle, the pipeline and the native copy.
+    model = xgb.XGBRegressor()
+    model.load_model(booster.save_raw(raw_format="ubj"))
+    joblib.dump(model, model_path)
+    joblib.dump(pipeline, pipeline_path)
+    save_native(model, native_path(model_path))
+
+    if n_val:
+        print(f"External-memory model validation MSE: {mean_squared_error(y_val, model.predict(X_val))}")
+    return model
@@ -0,0 +1,163 @@
+# sentry_lite/tracing.py
+"""
+Lightweight per-stage timers and counters for the scoring hot paths.
+
+    from sentry_lite.tracing import stage, count, tracer
+
+    with stage("predict"):
+        ...
+    count("score_cache_miss")
+    tracer.to_prometheus()   # or tracer.snapshot() for JSON
+
+Each stage keeps its total count and time plus the most recent RESERVOIR_SIZE
+durations, from which p50/p95/p99 are computed on export. Recording a sample is
+one perf_counter pair and a deque append.
+
+Set SENTRY_PROFILE_DIR (or pass a directory) to have profile() write one
+cProfile .prof file per request. Set SENTRY_DEBUG_METRICS=1 to have the
+Streamlit apps show the tracer in a sidebar expander (see metrics_panel).
+"""
+
+import cProfile
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+
+import numpy as np
+
+PROFILE_DIR_ENV = "SENTRY_PROFILE_DIR"
+DEBUG_METRICS_ENV = "SENTRY_DEBUG_METRICS"
+RESERVOIR_SIZE = 4096
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Tracer:
+    def __init__(self, reservoir_size=RESERVOIR_SIZE):
+        self.reservoir_size = reservoir_size
+        self._samples = {}
+        self._totals = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds):
+        with self._lock:
+            samples = self._samples.get(name)
+            if samples is None:
+                samples = self._samples[name] = deque(maxlen=self.reservoir_size)
+                self._totals[name] = [0, 0.0]
+            samples.append(seconds)
+            totals = self._totals[name]
+            totals[0] += 1
+            totals[1] += seconds
+
+    @contextmanager
+    def stage(self, name):
+        """Time the enclosed block as one sample of stage name."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def timed(self, name):
+        """Decorator form of stage()."""
+        def decorate(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.stage(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def count(self, name, n=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def snapshot(self):
+        """{"stages": {name: {count, sum_seconds, p50, p95, p99}}, "counters": {name: n}}; JSON-serializable."""
+        with self._lock:
+            samples = {name: np.fromiter(values, dtype=np.float64) for name, values in self._samples.items()}
+            totals = {name: list(values) for name, values in self._totals.items()}
+            counters = dict(self._counters)
+        stages = {}
+        for name, values in samples.items():
+            stats = {"count": totals[name][0], "sum_seconds": totals[name][1]}
+            for q, value in zip(QUANTILES, np.quantile(values, QUANTILES)):
+                stats[f"p{int(q * 100)}"] = float(value)
+            stages[name] = stats
+        return {"stages": stages, "counters": counters}
+
+    def to_json(self):
+        return json.dumps(self.snapshot())
+
+    def to_prometheus(self, prefix="sentry"):
+        """Prometheus text exposition: stage latencies as a summary, counters as counters."""
+        snap = self.snapshot()
+        lines = [f"# HELP {prefix}_stage_seconds Latency of instrumented stages (recent-sample quantiles).",
+                 f"# TYPE {prefix}_stage_seconds summary"]
+        for name, stats in sorted(snap["stages"].items()):
+            for q in QUANTILES:
+                lines.append(f'{prefix}_stage_seconds{{stage="{name}",quantile="{q}"}} {stats[f"p{int(q * 100)}"]:.9f}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{name}"}} {stats["sum_seconds"]:.9f}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{name}"}} {stats["count"]}')
+        lines += [f"# HELP {prefix}_events_total Instrumented event counters.",
+                  f"# TYPE {prefix}_events_total counter"]
+        for name, value in sorted(snap["counters"].items()):
+            lines.append(f'{prefix}_events_total{{event="{name}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._totals.clear()
+            self._counters.clear()
+
+
+# Process-wide tracer used by the instrumented sentry_lite functions.
+tracer = Tracer()
+stage = tracer.stage
+timed = tracer.timed
+count = tracer.count
+
+
+@contextmanager
+def profile(name="request", directory=None):
+    """
+    Run the enclosed block under cProfile and write <directory>/<name>-<id>.prof,
+    when directory (default: $SENTRY_PROFILE_DIR) is set; otherwise do nothing.
+    Yields the output path, or None when profiling is off.
+    """
+    directory = directory or os.environ.get(PROFILE_DIR_ENV)
+    if not directory:
+        yield None
+        return
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{name}-{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}.prof")
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield path
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+
+
+def metrics_panel(st, source=None):
+    """
+    When $SENTRY_DEBUG_METRICS is set, show the snapshot of source (default:
+    the process tracer) in a sidebar expander of the Streamlit module st, with
+    JSON and Prometheus downloads. Call it last, so the current run is included.
+    """
+    if not os.environ.get(DEBUG_METRICS_ENV):
+        return
+    source = source or tracer
+    with st.sidebar.expander("Debug metrics"):
+        st.json(source.snapshot())
+        st.download_button("Download JSON", source.to_json(), file_name="sentry_metrics.json", mime="application/json")
+        st.download_button("Download Prometheus", source.to_prometheus(), file_name="sentry_metrics.prom",
+                           mime="text/plain")
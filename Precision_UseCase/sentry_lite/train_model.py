@@ -1,12 +1,30 @@
 # sentry_lite/train_model.py 
 
-import pandas as pd 
+import argparse
 
-# from sentry_lite.risk_model import train_model 
-from risk_model import train_model
+from sentry_lite.datastore import read_table
+from sentry_lite.risk_model import train_model, update_model
+from sentry_lite.stream_training import train_external
 
  
 
-df = pd.read_excel("data/Synthetic Sponsor Risk Population -March 31 2025 -acb.xlsx") 
+parser = argparse.ArgumentParser(description="Train the SAR risk model.")
+parser.add_argument("--search", choices=["grid", "halving"], default="grid",
+                    help="grid: exhaustive GridSearchCV; halving: early-stopped successive halving that resumes from its checkpoint")
+parser.add_argument("--n-jobs", type=int, default=-1, help="Parallel fits (XGBoost threads are split across them)")
+parser.add_argument("--update", metavar="NEW_DATA",
+                    help="Continue boosting the saved model on these newly arrived records instead of retraining")
+parser.add_argument("--rounds", type=int, default=50, help="Trees to add with --update")
+parser.add_argument("--external", nargs="+", metavar="SHARD",
+                    help="Train out of core on these Parquet/CSV/Arrow shards (XGBoost external memory, hist)")
+parser.add_argument("--chunk-size", type=int, default=100_000, help="Rows decoded at a time with --external")
+args = parser.parse_args()
 
-train_model(df) 
\ No newline at end of file
+if args.external:
+    train_external(args.external, chunk_size=args.chunk_size)
+elif args.update:
+    update_model(read_table(args.update), n_rounds=args.rounds)
+else:
+    df = read_table("data/Synthetic Sponsor Risk Population -March 31 2025 -acb.xlsx") 
+
+    train_model(df, search=args.search, n_jobs=args.n_jobs)
@@ -0,0 +1,44 @@
+# tests/conftest.py
+import os
+import sys
+
+import pytest
+
+# The sentry_lite package lives next to this directory; the apps import it from Precision_UseCase.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sentry_lite.benchmark import TRAINING_COLUMNS, synthetic_population  # noqa: E402
+
+MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models", "sar_model.pkl")
+
+
+@pytest.fixture(scope="session")
+def population():
+    """A synthetic sponsor table with training, identity and system-check columns (20% duplicates)."""
+    return synthetic_population(5000, seed=3)
+
+
+@pytest.fixture(scope="session")
+def sar_model():
+    """The repository's trained SAR model."""
+    from sentry_lite.resources import load_model
+    return load_model(MODEL_PATH)
+
+
+@pytest.fixture(scope="session")
+def training_data(population):
+    """(X, y) as train_model sees them: raw features after create_interaction_features, and SAR."""
+    from sentry_lite.risk_model import split_features
+    return split_features(population[TRAINING_COLUMNS].copy())
+
+
+@pytest.fixture(scope="session")
+def pipeline_model(training_data):
+    """(model, pipeline, X): a FeaturePipeline fitted on X and a small XGBRegressor trained on its output."""
+    import xgboost as xgb
+    from sentry_lite.pipeline import FeaturePipeline
+    from sentry_lite.risk_model import LABEL_COLUMNS
+    X, y = training_data
+    pipeline = FeaturePipeline(LABEL_COLUMNS).fit(X)
+    model = xgb.XGBRegressor(n_estimators=20, max_depth=3, random_state=0).fit(pipeline.transform(X), y)
+    return model, pipeline, X
@@ -0,0 +1,60 @@
+# tests/test_batching.py
+import json
+
+import pytest
+import tornado.testing
+
+from conftest import MODEL_PATH
+from sentry_lite.batching import MicroBatcher
+from sentry_lite.benchmark import single_records
+from sentry_lite.risk_model import predict_risk_batch
+from sentry_lite.serve import ScoringService, make_app
+
+
+def test_bad_record_only_fails_its_own_request(population, sar_model):
+    records = single_records(population, 10)
+    batcher = MicroBatcher(sar_model, max_batch_size=32, max_wait_ms=200)
+    try:
+        futures = [batcher.submit(record) for record in records[:5]]
+        bad = batcher.submit({"Past_Sponsorships": "abc"})
+        futures += [batcher.submit(record) for record in records[5:]]
+        scores = [future.result(5) for future in futures]
+        with pytest.raises(ValueError):
+            bad.result(5)
+        assert batcher.stats()["batches"] == 1
+    finally:
+        batcher.close()
+    assert scores == pytest.approx(predict_risk_batch(records, sar_model).tolist(), rel=1e-6)
+
+
+def test_submit_rejects_non_dict_records(sar_model):
+    batcher = MicroBatcher(sar_model)
+    try:
+        with pytest.raises(TypeError):
+            batcher.submit("abc")
+    finally:
+        batcher.close()
+
+
+class PredictEndpointTest(tornado.testing.AsyncHTTPTestCase):
+    batch_size = 64
+
+    def get_app(self):
+        self.service = ScoringService(MODEL_PATH, max_batch_size=self.batch_size)
+        return make_app(self.service)
+
+    def post(self, body):
+        return self.fetch("/predict_risk", method="POST", body=json.dumps(body))
+
+    def test_non_object_records_are_rejected(self):
+        for body in [{"record": "abc"}, {"records": ["abc"]}, {"records": "abc"}, {"record": [1, 2]}]:
+            self.assertEqual(self.post(body).code, 400, body)
+
+    def test_valid_record_is_scored(self):
+        response = self.post({"record": {"Past_Sponsorships": 1}})
+        self.assertEqual(response.code, 200)
+        self.assertIn("score", json.loads(response.body))
+
+
+class UnbatchedPredictEndpointTest(PredictEndpointTest):
+    batch_size = 1
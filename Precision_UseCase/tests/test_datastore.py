@@ -0,0 +1,45 @@
+# tests/test_datastore.py
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from sentry_lite.datastore import arrow_schema, convert_workbook, normalize_dtypes, read_arrow, read_table
+
+
+def test_arrow_schema_handles_extension_dtypes(tmp_path):
+    df = normalize_dtypes(pd.DataFrame({
+        "county": pd.Series(["Douglas County, Nevada", None, "Douglas County, Nevada"], dtype="category"),
+        "email": pd.Series(["a@x.org", "b@y.org", None], dtype="string[pyarrow]"),
+        "score": pd.Series([1.5, None, 2.0], dtype=pd.ArrowDtype(pa.float32())),
+        "name": ["Ann", "Bo", None],
+        "flag": [True, False, True],
+    }))
+    schema = arrow_schema(df)
+    assert pa.types.is_dictionary(schema.field("county").type)
+    assert schema.field("name").type == pa.string()
+
+    path = str(tmp_path / "frame.arrow")
+    feather.write_feather(pa.Table.from_pandas(df, schema=schema, preserve_index=False), path,
+                          compression="uncompressed")
+    back = read_arrow(path)
+    assert back["county"].astype(str).tolist()[0] == "Douglas County, Nevada"
+    assert back["email"].tolist()[:2] == ["a@x.org", "b@y.org"]
+
+
+def test_excel_fallback_matches_arrow_copy(tmp_path):
+    workbook = str(tmp_path / "sponsors.xlsx")
+    pd.DataFrame({
+        "ssn": [123456789, "987-65-4321", None],
+        "dob": [pd.Timestamp("1980-02-11"), "11/02/1980", None],
+        "name": ["Ann", "Bo", None],
+        "age": [41, 52, 63],
+        "score": [1.5, None, 2.0],
+        "flag": [True, False, True],
+    }).to_excel(workbook, index=False)
+
+    from_excel = read_table(workbook)
+    convert_workbook(workbook)
+    from_arrow = read_table(workbook)
+
+    assert from_excel.dtypes.to_dict() == from_arrow.dtypes.to_dict()
+    pd.testing.assert_frame_equal(from_excel, from_arrow)
@@ -0,0 +1,50 @@
+# tests/test_deduplication.py
+import numpy as np
+import pandas as pd
+import pytest
+from rapidfuzz import fuzz, process
+
+from sentry_lite.deduplication import _normalize, build_index, soundex
+
+
+@pytest.fixture(scope="module")
+def index(population):
+    return build_index(population)
+
+
+def brute_force(index, value, threshold=85):
+    scores = np.rint(process.cdist([_normalize(value)], index.keys, scorer=fuzz.ratio, dtype=np.float64)[0])
+    return {(index.ids[row], int(scores[row])) for row in np.flatnonzero(scores > threshold)}
+
+
+def test_soundex():
+    assert [soundex(t) for t in ["robert", "rupert", "ashcraft", "tymczak", "pfister"]] == [
+        "r163", "r163", "a261", "t522", "p236"]
+
+
+def test_candidates_are_a_small_fraction(population, index):
+    for value in population["Sponsor_ID"].sample(200, random_state=0):
+        assert len(index.candidates(_normalize(value), 85)) < 0.05 * len(index)
+
+
+def test_query_matches_brute_force(population, index):
+    values = population["Sponsor_ID"].sample(200, random_state=1).tolist()
+    for value in values:
+        assert set(index.query(value)) == brute_force(index, value)
+
+    typo = values[0].replace(values[0].split()[0], values[0].split()[0] + "e", 1)
+    assert values[0] in [sponsor_id for sponsor_id, _ in index.query(typo)]
+
+
+def test_ids_without_blocking_keys_are_fully_scanned():
+    sponsors = pd.DataFrame({"Sponsor_ID": ["Maria Lopez 1980-02-11", "A-1234567", "A-1234568", "Mario Lopez"]})
+    index = build_index(sponsors)
+    for value in ["A-1234576", "Maria Lopez", "Maria Lopez 1980-02-11"]:
+        assert set(index.query(value)) == brute_force(index, value)
+        assert index.query_many([value]) == [index.query(value)]
+    assert [sponsor_id for sponsor_id, _ in index.query("A-1234576")] == ["A-1234567", "A-1234568"]
+
+
+def test_query_many_matches_query(population, index):
+    values = population["Sponsor_ID"].sample(100, random_state=2).tolist()
+    assert index.query_many(values) == [index.query(value) for value in values]
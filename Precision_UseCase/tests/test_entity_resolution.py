@@ -0,0 +1,72 @@
+# tests/test_entity_resolution.py
+import itertools
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+from sentry_lite.entity_resolution import (
+    MATCH_THRESHOLD, _bucket_pairs, candidate_pairs, normalize_identities, resolve_entities, score_pairs,
+)
+
+SPONSORS = pd.DataFrame({
+    "first_name": ["José", "Garcia", "Jose", "Mei", "Mei", "Omar"],
+    "last_name": ["Garcia", "José", "Garcia", "Chen", "Chen", "Haddad"],
+    "dob": ["1980-02-11", "02/11/1980", None, "1975-07-30", pd.Timestamp("1975-07-30"), "1990-01-01"],
+    "email": ["jg@x.org", "JG@x.org", None, "mei@y.org", "mei.chen@y.org", "omar@z.org"],
+    "phone": ["555-010-0100", "(555) 010-0100 x12", "5550100100", None, "555-020-0200", "555-030-0300"],
+    "ssn": ["123-45-6789", None, "123456789", "987-65-4321", None, None],
+})
+
+
+def test_normalize_identities():
+    normalized = normalize_identities(SPONSORS)
+    assert normalized["name"].tolist()[:3] == ["garcia jose"] * 3
+    assert normalized["dob"].tolist()[:2] == ["1980-02-11"] * 2
+    assert normalized["phone"].tolist()[:3] == ["5550100100"] * 3
+    assert normalized["email"].tolist()[1] == "jg@x.org"
+    assert normalized["ssn"].tolist()[:3] == ["123456789", pd.NA, "123456789"]
+
+
+def test_bucket_pairs_match_brute_force():
+    keys = np.sort(np.random.default_rng(0).integers(0, 40, 300))
+    rows = np.arange(len(keys))
+    for max_bucket in [3, 100]:
+        left, right = _bucket_pairs(keys, rows, max_bucket)
+        sizes = np.bincount(keys)
+        expected = {(i, j) for i, j in itertools.combinations(rows, 2) if keys[i] == keys[j] and sizes[keys[i]] <= max_bucket}
+        assert set(zip(left.tolist(), right.tolist())) == expected
+
+
+def test_score_pairs_uses_shared_fields_only():
+    normalized = normalize_identities(SPONSORS)
+    scores = score_pairs(normalized, np.array([0, 0, 3]), np.array([1, 2, 5]))
+    assert scores[0] == 1.0  # name, dob, email and phone agree; ssn is missing on one side
+    assert scores[1] == 1.0
+    assert scores[2] < MATCH_THRESHOLD  # only the names are comparable, and they differ
+
+
+def test_resolve_entities_clusters_variants():
+    resolved = resolve_entities(SPONSORS, workers=2)
+    labels = resolved["cluster_id"].to_numpy()
+    assert len(set(labels[:3])) == 1 and len(set(labels)) == 3
+    assert labels[3] == labels[4]
+    # Row 0 is the most complete of its cluster; rows 3 and 4 tie and the last one wins.
+    assert resolved["is_duplicate"].tolist() == [False, True, True, True, False, False]
+
+
+def test_resolve_entities_matches_all_pairs_scoring(population):
+    sample = population.head(600).reset_index(drop=True)
+    normalized = normalize_identities(sample)
+    left, right = np.triu_indices(len(sample), k=1)
+    matched = score_pairs(normalized, left, right) >= MATCH_THRESHOLD
+    graph = coo_matrix((np.ones(matched.sum()), (left[matched], right[matched])), shape=(len(sample),) * 2)
+    _, expected = connected_components(graph, directed=False)
+
+    got = resolve_entities(sample, workers=2)["cluster_id"].to_numpy()
+    assert pd.crosstab(expected, got).astype(bool).sum(axis=1).eq(1).all()
+    assert len(np.unique(expected)) == len(np.unique(got))
+
+    candidates = set(zip(*(side.tolist() for side in candidate_pairs(normalized))))
+    assert len(candidates) < 0.05 * len(left)
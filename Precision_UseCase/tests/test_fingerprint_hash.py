@@ -0,0 +1,46 @@
+# tests/test_fingerprint_hash.py
+import hashlib
+import hmac
+
+import pytest
+
+from sentry_lite.fingerprint_hash import (
+    FINGERPRINT_KEY_ENV, generate_sponsor_id, hash_fingerprint_directory, hash_fingerprint_file,
+)
+
+KEY = "test-secret"
+
+
+def test_deterministic_id_is_a_keyed_hmac():
+    data = b"ridge pattern"
+    assert generate_sponsor_id(data, deterministic=True, key=KEY) == generate_sponsor_id(data, deterministic=True, key=KEY)
+    assert generate_sponsor_id(data, deterministic=True, key=KEY) == hmac.new(KEY.encode(), data, hashlib.sha256).hexdigest()
+    assert generate_sponsor_id(data, deterministic=True, key="other") != generate_sponsor_id(data, deterministic=True, key=KEY)
+    assert generate_sponsor_id(data) != generate_sponsor_id(data, deterministic=True, key=KEY)
+
+
+def test_key_comes_from_the_environment(monkeypatch):
+    monkeypatch.delenv(FINGERPRINT_KEY_ENV, raising=False)
+    with pytest.raises(ValueError, match=FINGERPRINT_KEY_ENV):
+        generate_sponsor_id(b"x", deterministic=True)
+    monkeypatch.setenv(FINGERPRINT_KEY_ENV, KEY)
+    assert generate_sponsor_id(b"x", deterministic=True) == generate_sponsor_id(b"x", deterministic=True, key=KEY)
+
+
+def test_file_hash_streams_to_the_same_id(tmp_path):
+    data = bytes(range(256)) * 100
+    path = tmp_path / "print.png"
+    path.write_bytes(data)
+    assert hash_fingerprint_file(str(path), key=KEY, chunk_size=1000) == generate_sponsor_id(data, deterministic=True, key=KEY)
+
+
+def test_directory_hashes_fingerprint_files_only(tmp_path):
+    for name, data in [("a.txt", b"a"), ("b.JPG", b"b"), ("notes.doc", b"c")]:
+        (tmp_path / name).write_bytes(data)
+    (tmp_path / "nested.png").mkdir()
+
+    hashes = hash_fingerprint_directory(str(tmp_path), key=KEY, max_workers=2)
+    assert hashes == {
+        "a.txt": generate_sponsor_id(b"a", deterministic=True, key=KEY),
+        "b.JPG": generate_sponsor_id(b"b", deterministic=True, key=KEY),
+    }
@@ -0,0 +1,67 @@
+# tests/test_identity_index.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from sentry_lite.identity_index import IdentityIndex, identity_text, minhash_signatures
+
+FIELDS = ["first_name", "last_name", "dob", "phone", "email"]
+
+
+@pytest.fixture(scope="module")
+def index(population):
+    return IdentityIndex(population)
+
+
+def shingles(text, q=3):
+    return {text[i:i + q] for i in range(len(text) - q + 1)}
+
+
+def perturbed(record):
+    """The same sponsor as intake might type it: a name typo, a formatted phone and no email."""
+    phone = str(record["phone"])
+    return {"first_name": record["first_name"].upper() + "e", "last_name": record["last_name"], "dob": record["dob"],
+            "phone": f"({phone[:3]}) {phone[3:6]}-{phone[6:]}"}
+
+
+def test_identity_text_normalizes_fields():
+    df = pd.DataFrame({"first_name": ["Ann-Marie", None], "phone": ["(555) 010-0100", "5550100"],
+                       "email": ["A.Lee@X.org", None]})
+    assert identity_text(df, FIELDS).tolist() == ["ann marie 555 010 0100 a lee@x org", "5550100"]
+
+
+def test_minhash_estimates_jaccard():
+    texts = ["ann lee 1980 01 02 5550100", "anne lee 1980 01 02 5550100", "bo chen 1975 07 30 5550199"]
+    signatures = minhash_signatures(pd.Series(texts), num_perm=512)
+    for i, j in [(0, 1), (0, 2), (1, 2)]:
+        a, b = shingles(texts[i]), shingles(texts[j])
+        assert (signatures[i] == signatures[j]).mean() == pytest.approx(len(a & b) / len(a | b), abs=0.08)
+
+
+def test_query_finds_the_sponsor_itself_first(population, index):
+    for _, record in population[FIELDS + ["ID"]].sample(50, random_state=0).iterrows():
+        matches = index.query(record.to_dict(), k=10)
+        # Planted duplicates of the sponsor tie with it at 1.0.
+        assert matches[0][1] == 1.0 and (record["ID"], 1.0) in matches
+
+
+def test_query_finds_perturbed_records_like_a_full_scan(population, index):
+    sample = population.sample(100, random_state=1)
+    hits = 0
+    for _, record in sample.iterrows():
+        query = perturbed(record)
+        signature = index.signatures_of(pd.DataFrame([query]))[0]
+        best = index.ids[np.argmax((index.signatures == signature).mean(axis=1))]
+        found = [sponsor_id for sponsor_id, _ in index.query(query, k=5)]
+        assert len(index.candidates(signature)) < 0.05 * len(index)
+        hits += record["ID"] in found and best in found
+    assert hits >= 95
+
+
+def test_query_many_matches_query(population, index):
+    records = [perturbed(record) for _, record in population.head(30).iterrows()]
+    assert index.query_many(records, k=5) == [index.query(record, k=5) for record in records]
+
+
+def test_empty_identity_matches_nothing(index):
+    assert index.query({"first_name": "", "email": None}) == []
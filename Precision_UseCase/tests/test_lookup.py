@@ -0,0 +1,47 @@
+# tests/test_lookup.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from sentry_lite import registry
+from sentry_lite.lookup import RecordIndex
+from sentry_lite.resources import load_record_index
+
+
+@pytest.fixture
+def sponsors():
+    return pd.DataFrame({
+        "fingerprint_hash": ["f1", "f2", "f1", None],
+        "ssn": ["111", None, "222", "111"],
+        "email": ["a@x.org", "b@x.org", "c@x.org", "d@x.org"],
+        "first_name": ["Ann", "Bo", "Cy", "Di"],
+    }, index=[10, 11, 12, 13])
+
+
+def test_lookup_matches_boolean_mask(sponsors):
+    index = RecordIndex(sponsors)
+    assert set(index.indexes) == {"fingerprint_hash", "ssn", "email"}
+    for key in index.indexes:
+        for value in sponsors[key].dropna().unique().tolist() + ["missing"]:
+            pd.testing.assert_frame_equal(index.lookup(key, value), sponsors[sponsors[key] == value])
+    pd.testing.assert_frame_equal(index.lookup_fingerprint("f1"), sponsors.iloc[[0, 2]])
+
+
+def test_positions(sponsors):
+    index = RecordIndex(sponsors)
+    assert index.positions("ssn", "111").tolist() == [0, 3]
+    assert index.positions("ssn", "333").dtype == np.int64
+    assert len(index.positions("fingerprint_hash", None)) == 0
+    with pytest.raises(KeyError, match="phone"):
+        index.positions("phone", "555-0100")
+
+
+def test_load_record_index_registers_the_table(sponsors, tmp_path, monkeypatch):
+    monkeypatch.setattr(registry, "_datasets", {})
+    path = str(tmp_path / "sponsors.csv")
+    sponsors.to_csv(path, index=False)
+
+    index = load_record_index(path, name="intake")
+    assert load_record_index(path, name="intake") is index
+    assert registry.get("intake") is index.df
+    assert index.lookup("email", "c@x.org")["first_name"].tolist() == ["Cy"]
@@ -0,0 +1,47 @@
+# tests/test_model_store.py
+import threading
+import time
+
+import joblib
+import numpy as np
+
+from sentry_lite import resources
+from sentry_lite.model_store import NativeModel, native_path, resolve_model_source, save_native
+
+
+def test_native_model_matches_sklearn_wrapper(pipeline_model, tmp_path):
+    model, pipeline, X = pipeline_model
+    native = NativeModel(save_native(model, str(tmp_path / "model.ubj")))
+    features = pipeline.transform(X)
+    np.testing.assert_allclose(native.predict(features), model.predict(features), rtol=1e-6)
+
+
+def test_load_model_prefers_current_native_copy(pipeline_model, tmp_path):
+    model, pipeline, X = pipeline_model
+    pickle_path = str(tmp_path / "sar_model.pkl")
+    joblib.dump(model, pickle_path)
+    assert resolve_model_source(pickle_path) == pickle_path
+    save_native(model, native_path(pickle_path))
+    assert resolve_model_source(pickle_path) == native_path(pickle_path)
+    assert isinstance(resources.load_model(pickle_path), NativeModel)
+
+
+def test_concurrent_first_loads_load_once(pipeline_model, tmp_path, monkeypatch):
+    path = str(tmp_path / "sar_model.pkl")
+    joblib.dump(pipeline_model[0], path)
+    loads = []
+
+    def slow_load(source):
+        loads.append(source)
+        time.sleep(0.05)
+        return object()
+
+    monkeypatch.setattr(resources.joblib, "load", slow_load)
+    models = []
+    threads = [threading.Thread(target=lambda: models.append(resources.load_model(path))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(loads) == 1
+    assert all(model is models[0] for model in models)
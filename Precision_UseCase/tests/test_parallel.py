@@ -0,0 +1,26 @@
+# tests/test_parallel.py
+import numpy as np
+import pandas as pd
+
+from conftest import MODEL_PATH
+from sentry_lite import parallel
+from sentry_lite.risk_model import predict_risk_batch
+from sentry_lite.score_file import SCORE_COLUMN
+
+
+def test_main_parses_input_once_and_matches_batch_scores(population, sar_model, tmp_path, monkeypatch):
+    source, output = tmp_path / "sponsors.csv", tmp_path / "scored.csv"
+    population.head(300).to_csv(source, index=False)
+    reads = []
+    read_table = parallel.read_table
+    monkeypatch.setattr(parallel, "read_table", lambda path: reads.append(path) or read_table(path))
+
+    parallel.main([str(source), str(output), "--model", MODEL_PATH, "--pipeline", "",
+                   "--workers", "1", "--partition-rows", "128", "--columns", "UID"])
+
+    assert reads == [str(source)]
+    out = pd.read_csv(output)
+    assert list(out.columns) == ["UID", SCORE_COLUMN]
+    assert out["UID"].tolist() == population["UID"].head(300).tolist()
+    expected = predict_risk_batch(pd.read_csv(source), sar_model)
+    np.testing.assert_allclose(out[SCORE_COLUMN], expected, rtol=1e-5)
@@ -0,0 +1,44 @@
+# tests/test_pipeline.py
+import numpy as np
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+
+from sentry_lite.pipeline import FeaturePipeline
+from sentry_lite.risk_model import LABEL_COLUMNS
+
+
+def test_pipeline_matches_label_encoder_and_scaler(training_data):
+    X, _ = training_data
+    expected = X.copy()
+    for col in LABEL_COLUMNS:
+        expected[col] = LabelEncoder().fit_transform(expected[col])
+    expected = StandardScaler().fit_transform(expected.astype(np.float64))
+
+    transformed = FeaturePipeline(LABEL_COLUMNS).fit(X).transform(X)
+    np.testing.assert_allclose(transformed, expected, rtol=1e-5, atol=1e-5)
+
+
+def test_fit_stream_matches_fit(training_data):
+    X, _ = training_data
+    fitted = FeaturePipeline(LABEL_COLUMNS).fit(X)
+    streamed = FeaturePipeline(LABEL_COLUMNS).fit_stream(lambda: (X.iloc[i:i + 700] for i in range(0, len(X), 700)))
+    np.testing.assert_allclose(streamed.transform(X), fitted.transform(X), rtol=1e-5, atol=1e-5)
+
+
+def test_single_record_encoding_matches_batch(pipeline_model):
+    _, pipeline, X = pipeline_model
+    records = X.head(50).to_dict("records")
+    single = np.vstack([pipeline.transform(record) for record in records])
+    np.testing.assert_array_equal(single, pipeline.transform(X.head(50)))
+
+
+def test_numeric_label_columns_are_cast_to_training_dtype(pipeline_model):
+    _, pipeline, X = pipeline_model
+    assert pipeline.dtypes["Criminal_History"] == "int64"
+    # Use the class that is not the fill value, so a missed lookup would change the encoding.
+    value = 1 - int(pipeline.fill_values["Criminal_History"])
+    record = X.iloc[0].to_dict()
+    expected = pipeline.transform(dict(record, Criminal_History=value))
+    for value in [float(value), str(value), bool(value)]:
+        variant = dict(record, Criminal_History=value)
+        np.testing.assert_array_equal(pipeline.transform(variant), expected)
+        np.testing.assert_array_equal(pipeline.transform([variant]), expected)
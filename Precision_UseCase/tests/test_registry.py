@@ -0,0 +1,82 @@
+# tests/test_registry.py
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from sentry_lite import registry
+from sentry_lite.registry import DatasetHandle
+
+
+@pytest.fixture(autouse=True)
+def datasets(monkeypatch):
+    monkeypatch.setattr(registry, "_datasets", {})
+    registry.register("sponsors", lambda: pd.DataFrame({"a": [1, 2, 3], "b": [1.0, 2.0, 3.0]}), signature=1)
+
+
+def test_register_reloads_only_on_a_new_signature():
+    loads = []
+    frame = registry.register("sponsors", lambda: loads.append(1), signature=1)
+    assert loads == [] and frame is registry.get("sponsors")
+    registry.register("sponsors", lambda: pd.DataFrame({"a": [4]}), signature=2)
+    assert registry.get("sponsors")["a"].tolist() == [4]
+
+
+def test_derive_keeps_only_the_latest_key_per_derivation():
+    calls = []
+    def total(frame):
+        calls.append(1)
+        return frame["a"].sum()
+
+    assert registry.derive("sponsors", ("scores", "v1"), total) == 6
+    assert registry.derive("sponsors", ("scores", "v1"), total) == 6
+    assert len(calls) == 1
+    registry.derive("sponsors", ("scores", "v2"), total)
+    registry.derive("sponsors", "labels", len)
+    assert registry._datasets["sponsors"]["derived"] == {"scores": (("scores", "v2"), 6), "labels": ("labels", 3)}
+
+
+def test_derive_computes_outside_the_lock():
+    def slow(frame):
+        # Another session must be able to use the registry while this one computes.
+        other = threading.Thread(target=registry.derive, args=("sponsors", "labels", len))
+        other.start()
+        other.join(timeout=5)
+        assert not other.is_alive()
+        return 0
+
+    registry.derive("sponsors", "scores", slow)
+    assert registry._datasets["sponsors"]["derived"]["labels"] == ("labels", 3)
+
+
+def test_derive_does_not_store_results_for_a_reloaded_frame():
+    def reload_while_computing(frame):
+        registry.register("sponsors", lambda: pd.DataFrame({"a": [4]}), signature=2)
+        return frame["a"].sum()
+
+    assert registry.derive("sponsors", "scores", reload_while_computing) == 6
+    assert registry._datasets["sponsors"]["derived"] == {}
+
+
+def test_handle_edits_are_copy_on_write():
+    handle, other = DatasetHandle("sponsors"), DatasetHandle("sponsors", columns=["a"], rows=[2, 0])
+    handle.set_value(1, "a", 20)
+    handle.set_column("c", ["x", "y", "z"])
+
+    assert handle.frame()["a"].tolist() == [1, 20, 3]
+    assert handle.frame()["c"].tolist() == ["x", "y", "z"]
+    assert registry.get("sponsors")["a"].tolist() == [1, 2, 3]
+    assert other.frame()["a"].tolist() == [3, 1] and len(other) == 2
+    # Unedited columns are views of the shared data, not copies.
+    assert np.shares_memory(handle.frame()["b"].to_numpy(), registry.get("sponsors")["b"].to_numpy())
+
+    handle.reset()
+    assert handle.frame()["a"].tolist() == [1, 2, 3]
+
+
+def test_handle_drops_edits_when_the_dataset_reloads():
+    handle = DatasetHandle("sponsors")
+    handle.set_value(0, "a", 10)
+    registry.register("sponsors", lambda: pd.DataFrame({"a": [7, 8, 9]}), signature=2)
+    assert handle.frame()["a"].tolist() == [7, 8, 9]
@@ -0,0 +1,62 @@
+# tests/test_risk_aggregates.py
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from sentry_lite.risk_aggregates import RiskAggregates, parse_counties
+
+
+@pytest.fixture(scope="module")
+def scored(population):
+    counties = population["county"].astype("category")
+    scores = np.random.default_rng(0).uniform(-5, 105, len(population))
+    return counties, scores
+
+
+def test_parse_counties():
+    parsed = parse_counties(["Douglas County, Nevada", "Cook County", None])
+    assert parsed.values.tolist() == [["Douglas County", "Nevada"], ["Cook County", "Unknown"], ["Unknown", "Unknown"]]
+
+
+def test_incremental_aggregates_match_a_full_groupby(scored):
+    counties, scores = scored
+    aggregates = RiskAggregates()
+    for start in range(0, len(scores), 700):
+        aggregates.add(counties.iloc[start:start + 700], scores[start:start + 700])
+
+    frame = parse_counties(counties).assign(score=scores)
+    for keys, table in [(["County", "State"], aggregates.county_table()), (["State"], aggregates.state_table())]:
+        expected = frame.groupby(keys, sort=True)["score"].agg(["count", "sum", "mean"]).reset_index()
+        pd.testing.assert_frame_equal(table[keys + ["count", "sum", "mean"]], expected, check_dtype=False)
+        assert (table[aggregates.bin_labels()].sum(axis=1) == table["count"]).all()
+
+
+def test_histogram_clips_out_of_range_scores():
+    table = RiskAggregates().add(["A, Texas"] * 4, [-5, 0, 99.5, 120]).state_table()
+    assert table[["0-10", "90-100"]].values.tolist() == [[2, 2]]
+    assert table["State_Abbr"].tolist() == ["TX"]
+
+
+def test_reset_keeps_counties_but_drops_scores(scored):
+    counties, scores = scored
+    aggregates = RiskAggregates().add(counties, scores)
+    aggregates.reset()
+    assert aggregates.state_table().empty
+    aggregates.add(["A, Ohio"], [50])
+    assert aggregates.state_table()[["State", "count", "mean"]].values.tolist() == [["Ohio", 1, 50.0]]
+
+
+def test_concurrent_adds(scored):
+    counties, scores = scored
+    aggregates = RiskAggregates()
+    parts = np.array_split(np.arange(len(scores)), 8)
+    threads = [threading.Thread(target=aggregates.add, args=(counties.iloc[part], scores[part])) for part in parts]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    table = aggregates.state_table()
+    assert table["count"].sum() == len(scores)
+    assert table["sum"].sum() == pytest.approx(scores.sum())
@@ -0,0 +1,50 @@
+# tests/test_risk_model.py
+import json
+
+import numpy as np
+
+from sentry_lite.benchmark import single_records
+from sentry_lite.risk_model import preprocess_batch, preprocess_user_input, predict_risk, predict_risk_batch
+
+
+def test_preprocess_batch_matches_preprocess_user_input(population):
+    records = single_records(population, 100)
+    expected = [preprocess_user_input(dict(record)) for record in records]
+    batch = preprocess_batch(records)
+    for col in ["Family_Ties_Status", "Gender", "Country_of_Origin", "Financial_Status", "Criminal_History",
+                "Known_Trafficking_Route", "Past_Sponsorships", "Past_Denials"]:
+        assert batch[col].tolist() == [record[col] for record in expected], col
+
+
+def test_batch_matches_single_without_pipeline(population, sar_model):
+    records = single_records(population, 100)
+    single = [predict_risk(dict(record), sar_model) for record in records]
+    np.testing.assert_allclose(predict_risk_batch(records, sar_model), single, rtol=1e-6)
+
+
+def test_batch_matches_single_with_pipeline(pipeline_model):
+    model, pipeline, X = pipeline_model
+    records = X.head(100).to_dict("records")
+    single = [predict_risk(record, model, pipeline) for record in records]
+    np.testing.assert_allclose(predict_risk_batch(X.head(100), model, pipeline), single, rtol=1e-6)
+
+
+def test_empty_batch(sar_model):
+    assert predict_risk_batch([], sar_model).shape == (0,)
+
+
+def test_halving_search_checkpoints_every_trial_and_resumes(pipeline_model, training_data, tmp_path, monkeypatch):
+    from sentry_lite import risk_model
+    _, pipeline, X = pipeline_model
+    X_train, y_train = pipeline.transform(X.head(1500)), training_data[1].head(1500).to_numpy()
+    checkpoint = tmp_path / "search.jsonl"
+    best = risk_model.halving_search(X_train, y_train, n_candidates=4, factor=2, checkpoint_path=str(checkpoint), n_jobs=2)
+
+    trials = [json.loads(line) for line in checkpoint.read_text().splitlines()]
+    assert len(trials) == 4 + 2 + 1
+    assert {trial["round"] for trial in trials} == {0, 1, 2}
+
+    def refit(*args, **kwargs):
+        raise AssertionError("a checkpointed trial was fitted again")
+    monkeypatch.setattr(risk_model, "_fit_trial", refit)
+    assert risk_model.halving_search(X_train, y_train, n_candidates=4, factor=2, checkpoint_path=str(checkpoint), n_jobs=2) == best
@@ -0,0 +1,48 @@
+# tests/test_score_cache.py
+import contextlib
+import sqlite3
+
+import pytest
+
+from sentry_lite.risk_model import predict_risk
+from sentry_lite.score_cache import ScoreCache
+
+
+def disk_keys(path):
+    with contextlib.closing(sqlite3.connect(path)) as db:
+        return {row[0] for row in db.execute("SELECT key FROM scores")}
+
+
+def test_processes_on_different_models_share_the_disk_tier(tmp_path):
+    path = str(tmp_path / "scores.sqlite")
+    old, new = ScoreCache(disk_path=path, prune_every=1), ScoreCache(disk_path=path, prune_every=1)
+    old.put("old:1", 10.0)
+    new.put("new:1", 20.0)
+    old.put("old:2", 11.0)
+    assert disk_keys(path) == {"old:1", "old:2", "new:1"}
+    assert ScoreCache(disk_path=path).get("old:1") == 10.0
+
+
+def test_disk_tier_is_capped(tmp_path):
+    path = str(tmp_path / "scores.sqlite")
+    cache = ScoreCache(disk_path=path, disk_maxrows=5, prune_every=1)
+    for i in range(20):
+        cache.put(f"v:{i}", float(i))
+    assert disk_keys(path) == {f"v:{i}" for i in range(15, 20)}
+    assert cache.get("v:19") == 19.0
+
+
+def test_disk_tier_drops_expired_rows(tmp_path):
+    path = str(tmp_path / "scores.sqlite")
+    cache = ScoreCache(disk_path=path, ttl=60)
+    cache._execute("INSERT INTO scores VALUES (?, ?, ?)", ("v:stale", 1.0, 0.0))
+    cache.put("v:fresh", 2.0)
+    assert disk_keys(path) == {"v:fresh"}
+
+
+def test_predict_risk_matches_uncached(pipeline_model):
+    model, pipeline, X = pipeline_model
+    cache = ScoreCache(maxsize=64)
+    for record in X.head(20).to_dict("records") * 2:
+        assert cache.predict_risk(record, model, pipeline) == pytest.approx(float(predict_risk(record, model, pipeline)))
+    assert cache.stats()["hits"] == 20
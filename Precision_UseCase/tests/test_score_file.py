@@ -0,0 +1,32 @@
+# tests/test_score_file.py
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from sentry_lite.score_file import SCORE_COLUMN, ChunkWriter, score_file
+
+
+def test_chunk_writer_types_all_null_columns_as_strings(tmp_path):
+    path = str(tmp_path / "out.parquet")
+    writer = ChunkWriter(path)
+    writer.write(pd.DataFrame({"notes": [np.nan, np.nan], "score": [1.0, 2.0]}))
+    writer.write(pd.DataFrame({"notes": ["flagged", None], "score": [3.0, 4.0]}))
+    writer.write(pd.DataFrame({"notes": [7.0, np.nan], "score": [5.0, 6.0]}))
+    writer.close()
+    assert pq.read_table(path).to_pandas()["notes"].tolist() == [None, None, "flagged", None, "7.0", None]
+
+
+def test_score_file_csv_with_drifting_column(tmp_path, sar_model):
+    source, output = str(tmp_path / "extract.csv"), str(tmp_path / "scored.parquet")
+    pd.DataFrame({
+        "Sponsor_ID": ["a", "b", "c", "d"],
+        "notes": [None, None, "duplicate intake", "12345"],
+        "Past_Sponsorships": [0, 1, 2, 3],
+        "Criminal_History": [0, 1, 0, 1],
+    }).to_csv(source, index=False)
+
+    rows = score_file(source, output, sar_model, chunk_size=2)
+    scored = pq.read_table(output).to_pandas()
+    assert rows == 4
+    assert scored["notes"].tolist() == [None, None, "duplicate intake", "12345"]
+    assert scored[SCORE_COLUMN].notna().all()
@@ -0,0 +1,67 @@
+# tests/test_scoring.py
+import itertools
+
+import numpy as np
+import pytest
+
+from sentry_lite.scoring import calculate_d_score, calculate_d_score_batch
+
+
+def d_score_v1(score, sponsor_age, past_sponsorships, past_denials,
+               criminal_history, known_route, network_affiliation, prior_trafficking):
+    """The scalar if/else chain main_v1.py used before the rule sets."""
+    d_score = score
+    if past_sponsorships != 0:
+        d_score += past_sponsorships * 7
+    if past_denials != 0:
+        d_score += past_denials * 10
+    if 18 <= sponsor_age <= 28 or sponsor_age > 75:
+        d_score *= 1.2
+    if criminal_history:
+        d_score *= 1.5
+    if known_route and network_affiliation and prior_trafficking:
+        return 98
+    if known_route:
+        d_score = 87
+    if network_affiliation:
+        d_score = 89
+    if prior_trafficking:
+        d_score = 92
+    return min(int(d_score), 100)
+
+
+def d_score_v2(score, sponsor_age, past_sponsorships, past_denials,
+               criminal_history, known_route, network_affiliation, prior_trafficking):
+    """The scalar if/else chain main.py used before the rule sets."""
+    d_score = score
+    if past_sponsorships != 0:
+        d_score += past_sponsorships * 5
+    if past_denials != 0:
+        d_score = 87
+    if 18 <= sponsor_age <= 28 or sponsor_age > 75:
+        d_score *= 1.2
+    if criminal_history:
+        d_score *= 1.5
+    if known_route and network_affiliation and prior_trafficking:
+        return 98
+    if known_route:
+        d_score = 87
+    if network_affiliation:
+        d_score = 89
+    if prior_trafficking:
+        d_score = 92
+    return min(int(d_score), 100)
+
+
+CASES = list(itertools.product(
+    [0, 12.5, 47, 80], [17, 18, 28, 29, 75, 76], [0, 1, 3], [0, 2],
+    [False, True], [False, True], [False, True], [False, True],
+))
+
+
+@pytest.mark.parametrize("version, reference", [("v1", d_score_v1), ("v2", d_score_v2)])
+def test_rules_match_scalar_chain(version, reference):
+    columns = [np.array(values) for values in zip(*CASES)]
+    batch = calculate_d_score_batch(*columns, version=version)
+    assert batch.tolist() == [reference(*case) for case in CASES]
+    assert [calculate_d_score(*case, version=version) for case in CASES[::37]] == batch[::37].tolist()
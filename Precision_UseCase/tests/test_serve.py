@@ -0,0 +1,78 @@
+# tests/test_serve.py
+import json
+import os
+import tempfile
+
+import pytest
+import tornado.testing
+
+from conftest import MODEL_PATH
+from sentry_lite.benchmark import single_records, synthetic_population
+from sentry_lite.risk_model import predict_risk_batch
+from sentry_lite.scoring import calculate_d_score
+from sentry_lite.serve import ScoringService, make_app
+
+SPONSORS = synthetic_population(300, seed=5)
+D_SCORE_BODY = {"score": 47, "sponsor_age": 22, "past_sponsorships": 1, "past_denials": 0,
+                "criminal_history": True, "known_route": False, "network_affiliation": False, "prior_trafficking": False}
+
+
+class ServiceTest(tornado.testing.AsyncHTTPTestCase):
+    def get_app(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        sponsors_path = os.path.join(tmp_dir.name, "sponsors.csv")
+        SPONSORS.to_csv(sponsors_path, index=False)
+        self.service = ScoringService(MODEL_PATH, sponsors_path=sponsors_path, workers=2)
+        self.addCleanup(self.service.executor.shutdown)
+        return make_app(self.service)
+
+    def post(self, path, body):
+        response = self.fetch(path, method="POST", body=body if isinstance(body, str) else json.dumps(body))
+        return response.code, json.loads(response.body) if response.code == 200 else None
+
+    def test_health(self):
+        body = json.loads(self.fetch("/health").body)
+        self.assertEqual(body, {"status": "ok", "deduplication": True, "identity_matching": True})
+
+    def test_predict_risk_batch(self):
+        records = single_records(SPONSORS, 20)
+        code, body = self.post("/predict_risk", {"records": records})
+        self.assertEqual(code, 200)
+        self.assertEqual(body["scores"], pytest.approx(predict_risk_batch(records, self.service.model).tolist(), rel=1e-6))
+
+    def test_d_score(self):
+        self.assertEqual(self.post("/d_score", D_SCORE_BODY), (200, {"d_score": calculate_d_score(**D_SCORE_BODY)}))
+
+    def test_deduplicate_finds_the_sponsor_itself(self):
+        sponsor_id = SPONSORS["Sponsor_ID"].iloc[0]
+        code, body = self.post("/deduplicate", {"record": {"Sponsor_ID": sponsor_id}})
+        self.assertEqual(code, 200)
+        self.assertIn({"Sponsor_ID": sponsor_id, "score": 100}, body["matches"])
+
+    def test_match_ranks_the_sponsor_itself_first(self):
+        record = SPONSORS[["first_name", "last_name", "dob", "phone", "email"]].iloc[0].to_dict()
+        code, body = self.post("/match", {"record": record, "k": 3})
+        self.assertEqual(code, 200)
+        self.assertEqual(body["matches"][0], {"ID": int(SPONSORS["ID"].iloc[0]), "similarity": 1.0})
+        self.assertLessEqual(len(body["matches"]), 3)
+
+    def test_bad_requests_are_rejected(self):
+        self.assertEqual(self.post("/predict_risk", "not json")[0], 400)
+        self.assertEqual(self.post("/d_score", {"score": 47})[0], 400)
+        self.assertEqual(self.post("/deduplicate", {"record": {}})[0], 400)
+
+    def test_metrics_count_requests(self):
+        self.post("/d_score", D_SCORE_BODY)
+        body = json.loads(self.fetch("/metrics").body)
+        self.assertIn("http_d_score", json.dumps(body))
+        self.assertIn("batching", body)
+
+
+class NoSponsorsTest(tornado.testing.AsyncHTTPTestCase):
+    def get_app(self):
+        return make_app(ScoringService(MODEL_PATH, max_batch_size=1))
+
+    def test_lookups_need_a_sponsor_table(self):
+        for path, body in [("/deduplicate", {"record": {"Sponsor_ID": "Ann Lee 1980-01-01"}}), ("/match", {"record": {}})]:
+            self.assertEqual(self.fetch(path, method="POST", body=json.dumps(body)).code, 503, path)
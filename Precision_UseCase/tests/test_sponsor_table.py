@@ -0,0 +1,57 @@
+# tests/test_sponsor_table.py
+import numpy as np
+import pandas as pd
+
+from sentry_lite.deduplication import duplicate_clusters
+from sentry_lite.sponsor_table import (
+    FLAG_COLUMNS, HASH_COLUMNS, ORANGE_COLUMNS, PURPLE_COLUMNS, compact_sponsor_table, display_frame, hash_hex,
+    split_views,
+)
+
+
+def values(series):
+    """Series values with every kind of missing value as None."""
+    return [None if pd.isna(value) else value for value in series]
+
+
+def test_compact_dtypes_keep_the_values(population):
+    table = compact_sponsor_table(population)
+    assert list(table.columns) == ORANGE_COLUMNS + PURPLE_COLUMNS
+    assert all(isinstance(table[col].dtype, pd.CategoricalDtype) for col in ["county", "first_name", "last_name"])
+    assert all(table[col].dtype == bool for col in FLAG_COLUMNS)
+    assert str(table["email"].dtype) == "string"
+
+    for col in HASH_COLUMNS:
+        assert values(table[col].map(hash_hex, na_action="ignore")) == values(population[col])
+    for col in ["county", "first_name", "email", "ICE"]:
+        assert values(table[col]) == values(population[col]), col
+    assert table.memory_usage(deep=True).sum() < population[table.columns].memory_usage(deep=True).sum() / 2
+
+
+def test_split_views_do_not_copy(population):
+    table = compact_sponsor_table(population)
+    orange, purple = split_views(table)
+    assert list(orange.columns) == ORANGE_COLUMNS and list(purple.columns) == PURPLE_COLUMNS
+    assert np.shares_memory(purple["ICE"].to_numpy(), table["ICE"].to_numpy())
+    assert np.shares_memory(purple["county"].cat.codes.to_numpy(), table["county"].cat.codes.to_numpy())
+
+
+def test_non_digest_hashes_stay_text():
+    table = compact_sponsor_table(pd.DataFrame({"fingerprint_hash": ["abc", None], "ICE": [True, None]}))
+    assert values(table["fingerprint_hash"]) == ["abc", None]
+    assert table["ICE"].tolist() == [True, False]
+
+
+def test_display_frame_renders_hex(population):
+    table = compact_sponsor_table(population.head(5))
+    shown = display_frame(table)
+    assert values(shown["fingerprint_hash"]) == values(population["fingerprint_hash"].head(5))
+    assert isinstance(table["fingerprint_hash"].iloc[0], bytes)
+
+
+def test_duplicate_clusters_on_compact_table(population):
+    expected = duplicate_clusters(population)
+    got = duplicate_clusters(compact_sponsor_table(population))
+    # Same partition of rows, whatever the cluster numbering.
+    assert pd.crosstab(expected, got).astype(bool).sum(axis=1).eq(1).all()
+    assert len(np.unique(expected)) == len(np.unique(got))
@@ -0,0 +1,71 @@
+# tests/test_stream_training.py
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from sentry_lite.benchmark import TRAINING_COLUMNS
+from sentry_lite.model_store import native_path
+from sentry_lite.pipeline import FeaturePipeline
+from sentry_lite.risk_model import LABEL_COLUMNS, split_features
+from sentry_lite.stream_training import ShardIter, _validation_mask, train_external
+
+
+@pytest.fixture
+def shards(population, tmp_path):
+    frame = population[TRAINING_COLUMNS]
+    paths = [str(tmp_path / "shard0.parquet"), str(tmp_path / "shard1.parquet")]
+    frame.iloc[:3000].to_parquet(paths[0], index=False)
+    frame.iloc[3000:].to_parquet(paths[1], index=False)
+    return paths
+
+
+def test_fit_stream_matches_fit(training_data):
+    X, _ = training_data
+    whole = FeaturePipeline(LABEL_COLUMNS).fit(X)
+    streamed = FeaturePipeline(LABEL_COLUMNS).fit_stream(lambda: (X.iloc[i:i + 700] for i in range(0, len(X), 700)))
+    assert streamed.columns == whole.columns and streamed.dtypes == whole.dtypes
+    assert streamed.fill_values == whole.fill_values
+    for col in LABEL_COLUMNS:
+        assert streamed.encoders[col].equals(whole.encoders[col]), col
+    np.testing.assert_allclose(streamed.mean_, whole.mean_)
+    np.testing.assert_allclose(streamed.scale_, whole.scale_)
+
+
+def test_shard_iter_feeds_every_training_row_once(shards, pipeline_model):
+    _, pipeline, _ = pipeline_model
+    it = ShardIter(shards, pipeline, chunk_size=1000, validation_fraction=0.2)
+    fed = []
+    for _ in range(2):  # XGBoost makes several passes, so a reset must replay the same rows.
+        it.reset()
+        batches = []
+        while it.next(lambda data, label: batches.append((data, label))):
+            pass
+        fed.append(np.concatenate([label for _, label in batches]))
+
+    held_out = np.concatenate([_validation_mask(i, 1000, 0.2) for i in range(5)])
+    _, y = split_features(pd.concat([pd.read_parquet(path) for path in shards], ignore_index=True))
+    np.testing.assert_array_equal(fed[0], y.to_numpy()[~held_out])
+    np.testing.assert_array_equal(fed[1], fed[0])
+
+
+@pytest.mark.parametrize("mode", ["external", "quantile"])
+def test_train_external_saves_the_usual_artifacts(shards, tmp_path, mode):
+    model_path, pipeline_path = str(tmp_path / "sar_model.pkl"), str(tmp_path / "sar_pipeline.pkl")
+    model = train_external(shards, mode=mode, chunk_size=1000, num_boost_round=30, cache_dir=str(tmp_path / "cache"),
+                           model_path=model_path, pipeline_path=pipeline_path)
+
+    pipeline = joblib.load(pipeline_path)
+    X, y = split_features(pd.read_parquet(shards[0]))
+    predictions = joblib.load(model_path).predict(pipeline.transform(X))
+    np.testing.assert_allclose(predictions, model.predict(pipeline.transform(X)), rtol=1e-6)
+    assert np.corrcoef(predictions, y)[0, 1] > 0.5
+    assert os.path.exists(native_path(model_path))
+
+
+def test_unknown_mode(shards, tmp_path):
+    with pytest.raises(ValueError, match="mode"):
+        train_external(shards, mode="gpu", chunk_size=1000, model_path=str(tmp_path / "m.pkl"),
+                       pipeline_path=str(tmp_path / "p.pkl"))
@@ -0,0 +1,31 @@
+# tests/test_tracing.py
+import json
+from contextlib import nullcontext
+from types import SimpleNamespace
+
+from sentry_lite.tracing import DEBUG_METRICS_ENV, Tracer, metrics_panel
+
+
+def fake_streamlit(calls):
+    return SimpleNamespace(
+        sidebar=SimpleNamespace(expander=lambda label: nullcontext()),
+        json=lambda value: calls.append(("json", value)),
+        download_button=lambda label, data, **kwargs: calls.append(("download", kwargs["file_name"], data)),
+    )
+
+
+def test_metrics_panel_is_opt_in(monkeypatch):
+    tracer = Tracer()
+    with tracer.stage("render"):
+        pass
+    calls = []
+
+    monkeypatch.delenv(DEBUG_METRICS_ENV, raising=False)
+    metrics_panel(fake_streamlit(calls), tracer)
+    assert calls == []
+
+    monkeypatch.setenv(DEBUG_METRICS_ENV, "1")
+    metrics_panel(fake_streamlit(calls), tracer)
+    assert calls[0][1]["stages"]["render"]["count"] == 1
+    assert json.loads(calls[1][2]) == calls[0][1]
+    assert calls[2][1] == "sentry_metrics.prom" and 'stage="render"' in calls[2][2]
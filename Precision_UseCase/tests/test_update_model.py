@@ -0,0 +1,52 @@
+# tests/test_update_model.py
+import os
+
+import joblib
+import pytest
+
+from sentry_lite.benchmark import TRAINING_COLUMNS
+from sentry_lite.model_store import native_path
+from sentry_lite.risk_model import feature_drift, update_model
+
+
+@pytest.fixture
+def saved(pipeline_model, tmp_path):
+    model, pipeline, _ = pipeline_model
+    model_path, pipeline_path = str(tmp_path / "sar_model.pkl"), str(tmp_path / "sar_pipeline.pkl")
+    joblib.dump(model, model_path)
+    joblib.dump(pipeline, pipeline_path)
+    return model_path, pipeline_path
+
+
+def test_update_continues_from_the_saved_booster(population, saved):
+    model_path, pipeline_path = saved
+    # The saved model already fits this population; the tolerance lets a same-quality update through.
+    updated, accepted = update_model(population[TRAINING_COLUMNS].copy(), model_path, pipeline_path, n_rounds=10,
+                                     tolerance=1)
+    assert accepted
+    assert updated.get_booster().num_boosted_rounds() == 20 + 10
+    assert joblib.load(model_path).get_booster().num_boosted_rounds() == 30
+    assert os.path.exists(native_path(model_path))
+
+
+def test_worse_update_keeps_the_current_model(population, saved):
+    model_path, pipeline_path = saved
+    # A negative tolerance rejects any update, as a worse validation MSE would.
+    model, accepted = update_model(population[TRAINING_COLUMNS].copy(), model_path, pipeline_path, n_rounds=10,
+                                   tolerance=-1)
+    assert not accepted
+    assert model.get_booster().num_boosted_rounds() == 20
+    assert joblib.load(model_path).get_booster().num_boosted_rounds() == 20
+    assert not os.path.exists(native_path(model_path))
+
+
+def test_update_needs_a_saved_pipeline(population, saved, tmp_path):
+    with pytest.raises(FileNotFoundError):
+        update_model(population[TRAINING_COLUMNS].copy(), saved[0], str(tmp_path / "missing.pkl"))
+
+
+def test_feature_drift(pipeline_model):
+    _, pipeline, X = pipeline_model
+    assert feature_drift(pipeline, X) == {}
+    shifted = X.assign(Past_Denials=X["Past_Denials"] + 5)
+    assert set(feature_drift(pipeline, shifted)) == {"Past_Denials"}